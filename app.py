@@ -20,23 +20,33 @@
 RAG(Vector Store)管理、プロンプト定義、GUI画面をすべて単一ファイルに集約した完全自己完結型アプリケーションです。
 """
 
+import gc
 import sys
 import os
+import re
 import json
+import time
+import random
+import shutil
 import asyncio
+import functools
 import datetime
 import traceback
 import structlog
+from collections import OrderedDict
 from pathlib import Path
+from contextlib import aclosing, asynccontextmanager, suppress
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Literal, Union, AsyncGenerator, Callable, Awaitable
+from types import MappingProxyType
+from typing import ClassVar, Any, Literal, Self
+from collections.abc import Mapping, AsyncGenerator, Callable, Awaitable
 
 import flet as ft
 try:
     import flet_desktop
 except ImportError:
     pass
-from pydantic import BaseModel, ConfigDict, Field, field_validator, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from tenacity import retry, wait_exponential, stop_after_attempt
 from cryptography.fernet import Fernet, InvalidToken
@@ -78,7 +88,7 @@ def log_crash_and_exit(e: Exception):
 log = structlog.get_logger()
 
 # --- App System Data & Internal Prompts ---
-EMBEDDED_SYSTEM_PROMPTS: Dict[str, str] = {
+EMBEDDED_SYSTEM_PROMPTS: dict[str, str] = {
     "有価証券報告書 -財務分析-": """### ROLE
 You are a "Critical Financial Analyst" and "Strategic Business Mentor" for university students.
 Your mission is to deeply analyze the "Annual Securities Report" (有価証券報告書) to expose the reality behind the business models, financial numbers, and corporate strategies with evidence and clarity.
@@ -122,18 +132,18 @@ Transform the student's motive into an "Indispensable Problem Solver" perspectiv
 class PromptManager:
     """プロンプト管理（外部JSONがあれば読み込み、無ければ埋め込みプロンプトを利用）"""
     def __init__(self):
-        self.prompts: Dict[str, str] = EMBEDDED_SYSTEM_PROMPTS.copy()
+        self.prompts: dict[str, str] = EMBEDDED_SYSTEM_PROMPTS.copy()
         json_path = get_resource_path("system_prompts.json")
-        if json_path.exists():
-            try:
-                with json_path.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self.prompts.update(data)
-            except Exception as e:
-                log.warning("system_prompts.jsonの読み込みに失敗しました。内蔵プロンプトを使用します。", error=str(e))
-
-    def get_all_modes(self) -> List[str]:
+        try:
+            data = json.loads(json_path.read_bytes())
+            if isinstance(data, dict):
+                self.prompts.update(data)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("system_prompts.jsonの読み込みに失敗しました。内蔵プロンプトを使用します。", error=str(e))
+
+    def get_all_modes(self) -> list[str]:
         return list(self.prompts.keys())
 
     def get_prompt(self, mode_name: str) -> str:
@@ -149,85 +159,91 @@ class AppConfigDefaults:
 class UserConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra="ignore")
 
-    api_key: Optional[str] = Field(default=None, description="復号化されたOpenAI APIキー。")
+    api_key: str | None = Field(default=None, description="復号化されたOpenAI APIキー。")
     model: str = Field(default=AppConfigDefaults.DEFAULT_MODEL, description="選択されたOpenAIモデルのID。")
     reasoning_effort: Literal["none", "minimal", "low", "medium", "high", "xhigh"] = Field(
         default=AppConfigDefaults.DEFAULT_REASONING, description="モデルの推論強度。"
     )
     system_prompt_mode: str = Field(default="有価証券報告書 -財務分析-", description="現在選択されている分析戦略モード。")
-    last_response_id: Optional[str] = Field(default=None, description="前回のレスポンスID。")
-    current_vector_store_id: Optional[str] = Field(default=None, description="選択中のVector Store ID。")
+    last_response_id: str | None = Field(default=None, description="前回のレスポンスID。")
+    current_vector_store_id: str | None = Field(default=None, description="選択中のVector Store ID。")
     use_file_search: bool = Field(default=False, description="File Search (RAG) ツール有効フラグ。")
 
 
 class InputTextContent(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["input_text"] = "input_text"
     text: str
 
 
 class InputMessage(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     role: Literal["user", "assistant"]
-    content: List[InputTextContent]
+    content: list[InputTextContent]
 
 
 class FileSearchTool(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["file_search"] = "file_search"
-    vector_store_ids: List[str] = Field(default_factory=list)
+    # frozen でもリストは中身を書き換えられるため、使い回すインスタンスではタプルで保持する
+    vector_store_ids: tuple[str, ...] = Field(default_factory=tuple)
+
+    @field_serializer("vector_store_ids")
+    def serialize_vector_store_ids(self, v: tuple[str, ...]) -> list[str]:
+        return list(v)
 
 
 class WebSearchTool(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["web_search_preview"] = "web_search_preview"
-    search_context_size: Optional[Literal["low", "medium", "high"]] = "medium"
+    search_context_size: Literal["low", "medium", "high"] | None = "medium"
 
 
 class ReasoningOptions(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     effort: Literal["none", "minimal", "low", "medium", "high", "xhigh"] = "high"
 
 
 class ResponseRequestPayload(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
 
     model: str
-    input: List[InputMessage]
-    instructions: Optional[str] = None
-    reasoning: Optional[ReasoningOptions] = None
-    tools: Optional[List[Union[FileSearchTool, WebSearchTool]]] = None
-    previous_response_id: Optional[str] = None
+    input: list[InputMessage]
+    instructions: str | None = None
+    reasoning: ReasoningOptions | None = None
+    tools: list[FileSearchTool | WebSearchTool] | None = None
+    previous_response_id: str | None = None
     stream: bool = True
 
     @field_validator("input", mode="before")
     @classmethod
-    def normalize_input(cls, v: Any) -> List[Any]:
+    def normalize_input(cls, v: Any) -> list[Any]:
         if isinstance(v, str):
             return [{"role": "user", "content": [{"type": "input_text", "text": v}]}]
         return v
 
 
-class StreamTextDelta(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+# ストリームイベントはトークン毎に大量生成されるため、検証なしの軽量な dataclass で表現
+@dataclass(slots=True, frozen=True)
+class StreamTextDelta:
     delta: str
 
-class StreamResponseCreated(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamResponseCreated:
     response_id: str
 
-class StreamUsage(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamUsage:
     input_tokens: int = 0
     output_tokens: int = 0
     total_tokens: int = 0
     cached_tokens: int = 0
 
-class StreamError(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamError:
     message: str
 
-StreamResult = Union[StreamTextDelta, StreamResponseCreated, StreamUsage, StreamError]
+StreamResult = StreamTextDelta | StreamResponseCreated | StreamUsage | StreamError
 
 
 # --- Security & Config Storage ---
@@ -237,19 +253,31 @@ KEY_FILE = Path(_app_data_dir) / ".secret.key"
 
 class SecurityManager:
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _get_or_create_key() -> bytes:
-        if KEY_FILE.exists():
-            try:
-                return KEY_FILE.read_bytes()
-            except IOError as e:
-                log.error("キーファイルの読み込み失敗", error=str(e))
-                raise
+        # exists() で事前確認せず、読み込みを直接試みる (EAFP)
+        try:
+            return KEY_FILE.read_bytes()
+        except FileNotFoundError:
+            pass
+        except IOError as e:
+            log.error("キーファイルの読み込み失敗", error=str(e))
+            raise
 
         key = Fernet.generate_key()
         try:
-            KEY_FILE.write_bytes(key)
-            if os.name == "posix":
-                KEY_FILE.chmod(0o600)
+            # 書き込み途中で終了してキーが壊れる（= 保存済みAPIキーが復号できなくなる）ことを防ぐため、
+            # 作成時から所有者のみ読み書きできる一時ファイルに書いてから置き換える
+            tmp_file = KEY_FILE.with_name(KEY_FILE.name + ".tmp")
+            tmp_file.unlink(missing_ok=True)  # 前回の中断で残った一時ファイル
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(key)
+                os.replace(tmp_file, KEY_FILE)
+            except OSError:
+                tmp_file.unlink(missing_ok=True)
+                raise
         except IOError as e:
             log.critical("キー保存失敗", error=str(e))
             raise
@@ -260,80 +288,113 @@ class SecurityManager:
         if not plain_text:
             return ""
         try:
-            fernet = Fernet(cls._get_or_create_key())
+            fernet = _get_fernet()
             return fernet.encrypt(plain_text.encode("utf-8")).decode("utf-8")
         except Exception as e:
             log.error("暗号化失敗", error=str(e))
             return ""
 
     @classmethod
-    def decrypt(cls, cipher_text: str) -> Optional[str]:
+    def decrypt(cls, cipher_text: str) -> str | None:
         if not cipher_text:
             return None
         try:
-            fernet = Fernet(cls._get_or_create_key())
+            fernet = _get_fernet()
             return fernet.decrypt(cipher_text.encode("utf-8")).decode("utf-8")
         except (InvalidToken, Exception) as e:
             log.warning("復号化失敗", error=str(e))
             return None
 
 
+@functools.lru_cache(maxsize=1)
+def _get_fernet() -> Fernet:
+    # キー読み込みと Fernet の初期化はプロセス内で一度だけ行う
+    return Fernet(SecurityManager._get_or_create_key())
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    # 更新時刻とサイズで、前回の保存以降にファイルが変更されていないかを判定する
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 class ConfigManager:
+    _last_saved: tuple[Path, dict[str, Any], tuple[int, int]] | None = None
+
     @staticmethod
     def load() -> UserConfig:
-        config_data: Dict[str, Any] = {}
+        config_data: dict[str, Any] = {}
 
-        if CONFIG_FILE.exists():
-            try:
-                with CONFIG_FILE.open("r", encoding="utf-8") as f:
-                    file_data = json.load(f)
+        # exists() で事前確認せず、読み込みを直接試みる (EAFP)
+        try:
+            file_data = json.loads(CONFIG_FILE.read_bytes())
 
-                encrypted_key = file_data.get("encrypted_api_key")
-                if encrypted_key:
-                    decrypted_key = SecurityManager.decrypt(encrypted_key)
-                    file_data["api_key"] = decrypted_key
+            encrypted_key = file_data.get("encrypted_api_key")
+            if encrypted_key:
+                decrypted_key = SecurityManager.decrypt(encrypted_key)
+                file_data["api_key"] = decrypted_key
 
-                file_data.pop("encrypted_api_key", None)
-                config_data = file_data
-            except Exception as e:
-                log.error("設定ファイルの読み込み失敗", error=str(e))
+            file_data.pop("encrypted_api_key", None)
+            config_data = file_data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.error("設定ファイルの読み込み失敗", error=str(e))
 
         env_key = os.getenv("OPENAI_API_KEY")
         if env_key:
             config_data["api_key"] = env_key
 
-        config_data["model"] = AppConfigDefaults.DEFAULT_MODEL
-        config_data["reasoning_effort"] = AppConfigDefaults.DEFAULT_REASONING
+        config_data.pop("model", None)
+        config_data.pop("reasoning_effort", None)
 
         try:
-            return UserConfig(**config_data)
+            return UserConfig.model_validate(config_data)
         except ValidationError:
             return UserConfig()
 
     @staticmethod
     def save(config: UserConfig) -> None:
+        # 内容が前回の保存から変わっていなければ書き込みを省略する。
+        # 設定ファイルが削除・外部で編集された場合は、内容が同じでも書き直す
+        snapshot = config.model_dump()
+        last = ConfigManager._last_saved
+        if last is not None and last[:2] == (CONFIG_FILE, snapshot) and last[2] == _file_signature(CONFIG_FILE):
+            return
+
         try:
             data = config.model_dump(exclude={"api_key"})
+            key_saved = True
             if config.api_key:
                 encrypted = SecurityManager.encrypt(config.api_key)
                 if encrypted:
                     data["encrypted_api_key"] = encrypted
-
-            with CONFIG_FILE.open("w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
+                else:
+                    key_saved = False
+
+            # 書き込み途中で終了しても設定ファイルが壊れないよう、一時ファイル経由で置き換える
+            tmp_file = CONFIG_FILE.with_name(CONFIG_FILE.name + ".tmp")
+            tmp_file.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_file, CONFIG_FILE)
+            # APIキーを暗号化できずに保存できなかった場合は、次回の保存で再試行させる
+            signature = _file_signature(CONFIG_FILE)
+            ConfigManager._last_saved = (CONFIG_FILE, snapshot, signature) if key_saved and signature else None
         except IOError as e:
             log.error("設定の保存失敗", error=str(e))
 
 
 # --- Pricing & Cost Calculation ---
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ModelPricing:
     input_price: float
     output_price: float
     cached_input_price: float = 0.0
 
 
-PRICING_TABLE: Dict[str, ModelPricing] = {
+PRICING_TABLE: Mapping[str, ModelPricing] = MappingProxyType({
     "gpt-5.6-sol": ModelPricing(input_price=5.00, output_price=30.00, cached_input_price=0.50),
     "gpt-5.6-terra": ModelPricing(input_price=2.00, output_price=12.00, cached_input_price=0.20),
     "gpt-5.6-luna": ModelPricing(input_price=0.20, output_price=1.20, cached_input_price=0.02),
@@ -341,7 +402,7 @@ PRICING_TABLE: Dict[str, ModelPricing] = {
     "gpt-5.4": ModelPricing(input_price=2.50, output_price=15.00, cached_input_price=0.25),
     "gpt-4o": ModelPricing(input_price=2.50, output_price=10.00, cached_input_price=1.25),
     "gpt-4o-mini": ModelPricing(input_price=0.150, output_price=0.600, cached_input_price=0.075),
-}
+})
 
 
 class CostCalculator:
@@ -350,27 +411,42 @@ class CostCalculator:
         if isinstance(usage_event, str):
             return f"Cost: $0.00000 | {usage_event}"
 
+        pricing = PRICING_TABLE.get(model_name)
+        if not pricing:
+            return f"Cost: Unknown Model ({model_name})"
+
         try:
             prompt_tokens = getattr(usage_event, "input_tokens", 0)
             completion_tokens = getattr(usage_event, "output_tokens", 0)
             cached_tokens = getattr(usage_event, "cached_tokens", 0)
 
-            pricing = PRICING_TABLE.get(model_name)
-            if not pricing:
-                return f"Cost: Unknown Model ({model_name})"
-
             uncached_prompt_tokens = max(0, prompt_tokens - cached_tokens)
+            # 単価は100万トークンあたりのため、合算してから一度だけ割る
             cost = (
-                (uncached_prompt_tokens / 1_000_000) * pricing.input_price +
-                (cached_tokens / 1_000_000) * pricing.cached_input_price +
-                (completion_tokens / 1_000_000) * pricing.output_price
-            )
+                uncached_prompt_tokens * pricing.input_price +
+                cached_tokens * pricing.cached_input_price +
+                completion_tokens * pricing.output_price
+            ) / 1_000_000
             return f"Cost: ${cost:.5f} | In: {prompt_tokens} (Cache: {cached_tokens}) | Out: {completion_tokens}"
         except Exception as e:
             return f"Cost Error: {str(e)}"
 
 
 # --- Error Translation ---
+# 例外メッセージの判定用パターン（モジュール読み込み時に一度だけコンパイル）
+_LOCK_RE = re.compile(r"WinError 32|Permission denied|(?i:locked)")
+_TIMEOUT_RE = re.compile(r"APITimeoutError|(?i:timed out)")
+_KEY_FORMAT_RE = re.compile(r"ascii|ordinal not in range|codec", re.IGNORECASE)
+_AUTH_RE = re.compile(r"AuthenticationError|401|(?i:invalid_api_key)")
+_QUOTA_RE = re.compile(r"quota|billing|credit", re.IGNORECASE)
+_CONTEXT_RE = re.compile(
+    r"context_length_exceeded|maximum context length|exceeds the context window"
+    r"|string_above_max_length|too long|token limit",
+    re.IGNORECASE,
+)
+_REASONING_RE = re.compile(r"reasoning_effort|reasoning\.effort")
+
+
 def translate_api_error(e: Exception) -> str:
     """
     OpenAI APIエラーおよびシステム例外を初心者に分かりやすい丁寧な日本語メッセージに変換します。
@@ -387,7 +463,7 @@ def translate_api_error(e: Exception) -> str:
     err_str = str(e)
 
     # 1. アプリの多重起動によるロック / ファイル権限エラー
-    if isinstance(e, PermissionError) or "WinError 32" in err_str or "Permission denied" in err_str or "locked" in err_str.lower():
+    if isinstance(e, PermissionError) or _LOCK_RE.search(err_str):
         return (
             "【アプリの多重起動エラー】 (App Lock Error)\n"
             "SYUKATSU Supportがすでに別のウィンドウまたはバックグラウンドで起動しているため、設定ファイルやデータがロックされています。\n"
@@ -395,7 +471,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 2. タイムアウト
-    if isinstance(e, (openai.APITimeoutError, TimeoutError)) or "APITimeoutError" in err_str or "timed out" in err_str.lower():
+    if isinstance(e, (openai.APITimeoutError, TimeoutError)) or _TIMEOUT_RE.search(err_str):
         return (
             "【通信タイムアウト】 (APITimeoutError)\n"
             "OpenAIサーバーからの応答が制限時間を超えました。\n"
@@ -403,7 +479,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 3. APIキー形式エラー (UnicodeEncodeError / 全角文字混入など)
-    if isinstance(e, (UnicodeEncodeError, UnicodeError)) or "ascii" in err_str.lower() or "ordinal not in range" in err_str.lower() or "codec" in err_str.lower():
+    if isinstance(e, (UnicodeEncodeError, UnicodeError)) or _KEY_FORMAT_RE.search(err_str):
         return (
             "【APIキー文字エラー】 (Invalid Key Format)\n"
             "入力されたOpenAI APIキーに全角文字や全角スペースなど、使用できない文字が含まれています。\n"
@@ -412,7 +488,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 4. APIキーが誤っている (AuthenticationError)
-    if isinstance(e, openai.AuthenticationError) or "AuthenticationError" in err_str or "invalid_api_key" in err_str.lower() or "401" in err_str:
+    if isinstance(e, openai.AuthenticationError) or _AUTH_RE.search(err_str):
         return (
             "【APIキーエラー】 (AuthenticationError)\n"
             "入力されたOpenAI APIキーが正しくないか、無効化されています。\n"
@@ -422,7 +498,7 @@ def translate_api_error(e: Exception) -> str:
     # 4. API利用上限 / 残高不足 (RateLimitError)
     if isinstance(e, openai.RateLimitError) or "RateLimitError" in err_str:
         # クレジットの残高が不足している場合
-        if "insufficient_quota" in err_str or "quota" in err_str.lower() or "billing" in err_str.lower() or "credit" in err_str.lower():
+        if _QUOTA_RE.search(err_str):
             return (
                 "【クレジット残高不足】 (Insufficient Quota)\n"
                 "OpenAIアカウントの無料利用分が終了したか、チャージ残高が不足しています。\n"
@@ -434,24 +510,18 @@ def translate_api_error(e: Exception) -> str:
             "短時間での利用回数または利用量の上限（レートリミット）に達しました。\n"
             "数十秒〜数分ほど時間を置いてから再度お試しください。"
         )
-        # 短期的なAPI利用上限（レート制限）に達している場合
-        return (
-            "【一時的な利用制限】 (RateLimitError)\n"
-            "短時間での利用回数または利用量の上限（レートリミット）に達しました。\n"
-            "数十秒〜数分ほど時間を置いてから再度お試しください。"
-        )
 
     # 5. リクエストエラー (BadRequestError) - 入力トークン上限オーバー / 推論レベルミスマッチ等
     if isinstance(e, openai.BadRequestError) or "BadRequestError" in err_str:
         # 入力トークン上限オーバー
-        if any(k in err_str.lower() for k in ["context_length_exceeded", "maximum context length", "exceeds the context window", "string_above_max_length", "too long", "token limit"]):
+        if _CONTEXT_RE.search(err_str):
             return (
                 "【入力文字数制限オーバー】 (Context Window Exceeded)\n"
                 "送信した文章または過去の会話履歴が、AIが一度に処理できる制限（トークン上限）を超えています。\n"
                 "「🧹 コンテキスト消去」ボタンを押して会話履歴をリセットするか、質問文を短くして再度お試しください。"
             )
         # 推論レベルミスマッチ
-        if "reasoning_effort" in err_str or "reasoning.effort" in err_str:
+        if _REASONING_RE.search(err_str):
             return (
                 "【モデル設定エラー】 (Reasoning Effort Error)\n"
                 "選択した推論強度が、現在のモデルでサポートされていません。\n"
@@ -504,18 +574,171 @@ def translate_api_error(e: Exception) -> str:
 
 
 # --- OpenAI Client Infrastructure ---
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+async def _coalesce_text_deltas(results: AsyncGenerator[StreamResult], max_chunks: int = 8, interval: float = 0.016) -> AsyncGenerator[StreamResult]:
+    # 連続するテキスト差分をまとめ、トークン毎の UI 再描画を減らす。
+    # max_chunks 件溜まるか、最初の差分から interval 秒が経過した時点（タイマーで判定）で送出する。
+    # テキスト以外のイベント（エラーを含む）やストリームの終了時には、溜めた差分を先に送出する
+    buf: list[str] = []
+    deadline = 0.0
+    it = aiter(results)
+    pending: asyncio.Future[StreamResult] | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(it))
+            if buf:
+                # 次のイベントを待つのは、先頭の差分を溜めてから interval 秒後まで
+                done, _ = await asyncio.wait({pending}, timeout=max(deadline - time.monotonic(), 0))
+                if not done:
+                    yield StreamTextDelta(delta="".join(buf))
+                    buf.clear()
+                    continue
+            try:
+                result = await pending
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            if isinstance(result, StreamTextDelta):
+                if not buf:
+                    deadline = time.monotonic() + interval
+                buf.append(result.delta)
+                if len(buf) >= max_chunks:
+                    yield StreamTextDelta(delta="".join(buf))
+                    buf.clear()
+                continue
+            if buf:
+                yield StreamTextDelta(delta="".join(buf))
+                buf.clear()
+            yield result
+        if buf:
+            yield StreamTextDelta(delta="".join(buf))
+    finally:
+        # 途中で閉じられた場合は、読み取り待ちのタスクを終わらせてから元のストリームも閉じ、
+        # 接続（_get_client の利用）を GC まで保持させない
+        if pending is not None:
+            pending.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+        await it.aclose()
+
+
+def _coalesce_inflight(func):
+    """同じ引数で同時に呼ばれた一覧取得を、実行中の1つのリクエストにまとめるデコレータ。"""
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> list[Any]:
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(self, *args, **kwargs))
+            self._inflight[key] = task
+
+            def _done(t: asyncio.Future[list[Any]]) -> None:
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                if not t.cancelled():
+                    t.exception()  # 待機者がいなくても未取得の例外として警告させない
+
+            task.add_done_callback(_done)
+        # 呼び出し元のキャンセルが、相乗りしている他の呼び出しに波及しないよう shield する
+        return list(await asyncio.shield(task))
+    return wrapper
+
+def _invalidates_list_cache(func):
+    """更新系の操作の後（失敗時も含む）に、一覧取得のキャッシュを破棄するデコレータ。"""
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            self._invalidate_list_cache()
+    return wrapper
+
 class OpenAIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, list_cache_ttl: float = 5.0, file_meta_ttl: float = 600.0, file_meta_maxsize: int = 512):
         self.api_key = api_key
+        self._client: AsyncOpenAI | None = None
+        # _get_client() を使用中の処理数。0 になると _idle がセットされる
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # 一覧取得（Vector Store / ファイル）の短期キャッシュ: key -> (有効期限, 結果)
+        self._list_cache_ttl = list_cache_ttl
+        self._list_cache: dict[tuple[Any, ...], tuple[float, list[Any]]] = {}
+        self._list_cache_gen = 0
+        # 実行中の一覧取得リクエスト（同時呼び出しの重複排除用）
+        self._inflight: dict[tuple[Any, ...], asyncio.Future[list[Any]]] = {}
+        # ファイルメタデータ（名前・作成日時は不変）のキャッシュ: file_id -> (有効期限, FileObject)
+        # 多数の Store を閲覧しても増え続けないよう、最大件数を超えたら最も古く使われたものから破棄する
+        self._file_meta_ttl = file_meta_ttl
+        self._file_meta_maxsize = file_meta_maxsize
+        self._file_meta_cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    @asynccontextmanager
+    async def _get_client(self) -> AsyncGenerator[AsyncOpenAI]:
+        # 接続プール（TCP/TLS セッション）を使い回すため、AsyncOpenAI は1つだけ生成して共有する。
+        # ここでは close せず、破棄は aclose() で行う。
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        self._active += 1
+        self._idle.clear()
+        try:
+            yield self._client
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+    async def aclose(self, wait_idle: bool = False) -> None:
+        """
+        共有している AsyncOpenAI クライアントの接続を閉じます。
+
+        wait_idle=True の場合は、実行中のリクエスト（ストリームを含む）がすべて終わるのを待ってから閉じます。
+        """
+        if wait_idle:
+            await self._idle.wait()
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    def _get_cached_list(self, key: tuple[Any, ...]) -> list[Any] | None:
+        entry = self._list_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._list_cache[key]
+            return None
+        return list(value)
+
+    def _set_cached_list(self, key: tuple[Any, ...], value: list[Any], gen: int) -> None:
+        # 取得中に更新系の操作が挟まった場合、その結果は古い可能性があるためキャッシュしない
+        if self._list_cache_ttl > 0 and gen == self._list_cache_gen:
+            self._list_cache[key] = (time.monotonic() + self._list_cache_ttl, list(value))
 
-    def _get_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(api_key=self.api_key)
+    def _invalidate_list_cache(self) -> None:
+        self._list_cache_gen += 1
+        self._list_cache.clear()
+        self._inflight.clear()
 
-    async def stream_analysis(self, payload: ResponseRequestPayload) -> AsyncGenerator[StreamResult, None]:
+    async def stream_analysis(self, payload: ResponseRequestPayload, coalesce: bool = True) -> AsyncGenerator[StreamResult]:
         try:
             request_params = payload.model_dump(exclude_none=True)
-            async for result in self._execute_stream(request_params):
-                yield result
+            results = self._execute_stream(request_params)
+            if coalesce:
+                results = _coalesce_text_deltas(results)
+            async with aclosing(results):
+                async for result in results:
+                    yield result
         except Exception as e:
             log.exception("stream_analysisエラー", error=str(e))
             yield StreamError(message=f"\n[Unexpected Error] {e}")
@@ -524,7 +747,7 @@ class OpenAIClient:
     async def _create_stream(self, client: AsyncOpenAI, request_params: dict) -> Any:
         return await client.responses.create(**request_params)
 
-    async def _execute_stream(self, request_params: dict) -> AsyncGenerator[StreamResult, None]:
+    async def _execute_stream(self, request_params: dict) -> AsyncGenerator[StreamResult]:
         try:
             async with self._get_client() as client:
                 stream = await self._create_stream(client, request_params)
@@ -537,74 +760,115 @@ class OpenAIClient:
         except Exception as e:
             yield StreamError(message=f"\n{translate_api_error(e)}")
 
-    def _process_event(self, event: Any) -> Optional[StreamResult]:
-        event_type = getattr(event, "type", None)
-        if not event_type:
-            return None
+    def _process_event(self, event: Any) -> StreamResult | None:
+        # イベント種別ごとの処理を辞書で引き、比較の連鎖を通さずに振り分ける
+        handler = self._EVENT_HANDLERS.get(getattr(event, "type", None))
+        return handler(self, event) if handler else None
 
-        if event_type in ["response.output_text.delta", "response.reasoning_text.delta"]:
-            delta_content = getattr(event, "delta", None)
-            return StreamTextDelta(delta=delta_content) if delta_content else None
-        elif event_type == "response.created":
-            response_obj = getattr(event, "response", None)
-            if response_obj and hasattr(response_obj, "id"):
-                return StreamResponseCreated(response_id=response_obj.id)
-        elif event_type == "response.completed":
-            response_obj = getattr(event, "response", None)
-            if not response_obj:
-                return None
-            usage_obj = getattr(response_obj, "usage", None)
-            if not usage_obj:
-                return None
-            cached_tokens = 0
-            input_details = getattr(usage_obj, "input_tokens_details", None)
-            if input_details:
-                cached_tokens = getattr(input_details, "cached_tokens", 0)
-            return StreamUsage(
-                input_tokens=getattr(usage_obj, "input_tokens", 0),
-                output_tokens=getattr(usage_obj, "output_tokens", 0),
-                total_tokens=getattr(usage_obj, "total_tokens", 0),
-                cached_tokens=cached_tokens,
-            )
-        elif event_type == "error":
-            error_obj = getattr(event, "error", None)
-            msg = getattr(error_obj, "message", str(error_obj)) if error_obj else "Unknown error"
-            translated = translate_api_error(Exception(msg))
-            return StreamError(message=f"\n{translated}")
+    def _handle_text_delta(self, event: Any) -> StreamResult | None:
+        delta_content = getattr(event, "delta", None)
+        return StreamTextDelta(delta=delta_content) if delta_content else None
 
+    def _handle_response_created(self, event: Any) -> StreamResult | None:
+        response_obj = getattr(event, "response", None)
+        if response_obj and hasattr(response_obj, "id"):
+            return StreamResponseCreated(response_id=response_obj.id)
         return None
 
+    def _handle_response_completed(self, event: Any) -> StreamResult | None:
+        response_obj = getattr(event, "response", None)
+        if not response_obj:
+            return None
+        usage_obj = getattr(response_obj, "usage", None)
+        if not usage_obj:
+            return None
+        cached_tokens = 0
+        input_details = getattr(usage_obj, "input_tokens_details", None)
+        if input_details:
+            cached_tokens = getattr(input_details, "cached_tokens", 0)
+        return StreamUsage(
+            input_tokens=getattr(usage_obj, "input_tokens", 0),
+            output_tokens=getattr(usage_obj, "output_tokens", 0),
+            total_tokens=getattr(usage_obj, "total_tokens", 0),
+            cached_tokens=cached_tokens,
+        )
+
+    def _handle_error_event(self, event: Any) -> StreamResult | None:
+        error_obj = getattr(event, "error", None)
+        msg = getattr(error_obj, "message", str(error_obj)) if error_obj else "Unknown error"
+        translated = translate_api_error(Exception(msg))
+        return StreamError(message=f"\n{translated}")
+
+    # イベント種別 -> 処理関数。実行中に書き換えられないよう読み取り専用ビューとして保持する
+    _EVENT_HANDLERS: ClassVar[Mapping[str, Callable[..., StreamResult | None]]] = MappingProxyType({
+        "response.output_text.delta": _handle_text_delta,
+        "response.reasoning_text.delta": _handle_text_delta,
+        "response.created": _handle_response_created,
+        "response.completed": _handle_response_completed,
+        "error": _handle_error_event,
+    })
+
     # --- Vector Store & File Operations ---
-    async def list_vector_stores(self, limit: int = 20) -> List[Any]:
+    async def iter_vector_stores(self, page_size: int = 20) -> AsyncGenerator[Any]:
+        # SDK の自動ページネーションで、必要になった時点で次のページを取得する
+        async with self._get_client() as client:
+            async for vs in client.vector_stores.list(limit=page_size):
+                yield vs
+
+    @_coalesce_inflight
+    async def list_vector_stores(self, limit: int = 20) -> list[Any]:
         try:
-            async with self._get_client() as client:
-                res = await client.vector_stores.list(limit=limit)
-                return list(res.data)
+            key = ("vector_stores", limit)
+            cached = self._get_cached_list(key)
+            if cached is not None:
+                return cached
+            gen = self._list_cache_gen
+            # limit は1ページあたりの件数。先頭ページで打ち切らず、全件を取得する
+            stores = [vs async for vs in self.iter_vector_stores(page_size=limit)]
+            self._set_cached_list(key, stores, gen)
+            return stores
         except Exception as e:
             log.error("Vector Store取得失敗", error=str(e))
             return []
 
+    @_invalidates_list_cache
     async def create_vector_store(self, name: str) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.create(name=name)
 
+    @_invalidates_list_cache
     async def update_vector_store(self, vector_store_id: str, name: str) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.update(vector_store_id=vector_store_id, name=name)
 
+    @_invalidates_list_cache
     async def delete_vector_store(self, vector_store_id: str) -> bool:
         async with self._get_client() as client:
             res = await client.vector_stores.delete(vector_store_id=vector_store_id)
             return res.deleted
 
-    async def list_files_in_store(self, vector_store_id: str) -> List[Any]:
+    async def iter_files_in_store(self, vector_store_id: str, page_size: int = 100) -> AsyncGenerator[Any]:
+        # 1ページの件数を API 上限 (100) にして往復回数を抑え、次のページは必要になった時点で取得する
+        async with self._get_client() as client:
+            async for f in client.vector_stores.files.list(vector_store_id=vector_store_id, limit=page_size):
+                yield f
+
+    @_coalesce_inflight
+    async def list_files_in_store(self, vector_store_id: str) -> list[Any]:
+        key = ("files", vector_store_id)
+        cached = self._get_cached_list(key)
+        if cached is not None:
+            return cached
+        gen = self._list_cache_gen
         try:
-            async with self._get_client() as client:
-                res = await client.vector_stores.files.list(vector_store_id=vector_store_id)
-                return list(res.data)
+            files = [f async for f in self.iter_files_in_store(vector_store_id)]
         except NotFoundError:
-            return []
+            # 削除済みの Store に問い合わせを繰り返さないよう、404 の結果（空）もキャッシュする
+            files = []
+        self._set_cached_list(key, files, gen)
+        return files
 
+    @_invalidates_list_cache
     async def delete_file_from_store(self, vector_store_id: str, file_id: str) -> bool:
         async with self._get_client() as client:
             res = await client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
@@ -612,32 +876,103 @@ class OpenAIClient:
 
     async def upload_file(self, file_path: str, purpose: str = "assistants") -> Any:
         path_obj = Path(file_path)
-        if not path_obj.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        # 大きなファイルの読み込みでイベントループを止めないよう、ディスクI/Oはスレッドで行う。
+        # 存在確認も読み込みの失敗で判定し、ループ上でのファイルシステム呼び出しを残さない
+        try:
+            data = await asyncio.to_thread(path_obj.read_bytes)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
         async with self._get_client() as client:
-            with path_obj.open("rb") as f:
-                return await client.files.create(file=f, purpose=purpose)
-
+            return await client.files.create(file=(path_obj.name, data), purpose=purpose)
+
+    async def upload_files(self, file_paths: list[str], purpose: str = "assistants", concurrency: int = 4) -> list[Any]:
+        # 同時実行数を制限しつつ並行アップロード。失敗時はアップロード済みのファイルを削除してから再送出
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _upload_one(path: str) -> Any:
+            async with sem:
+                return await self.upload_file(path, purpose=purpose)
+
+        results = await asyncio.gather(*(_upload_one(p) for p in file_paths), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.delete_files([r.id for r in results if not isinstance(r, BaseException)], concurrency=concurrency)
+            raise errors[0]
+        return results
+
+    async def delete_files(self, file_ids: list[str], concurrency: int = 4) -> list[str]:
+        # 複数ファイルを並行して削除し、削除に失敗したファイルIDを返す
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _delete_one(file_id: str) -> bool:
+            async with sem:
+                return await self.delete_file(file_id)
+
+        results = await asyncio.gather(*(_delete_one(fid) for fid in file_ids), return_exceptions=True)
+        failed = []
+        for fid, r in zip(file_ids, results):
+            if isinstance(r, BaseException):
+                log.warning("ファイルの削除に失敗しました", file_id=fid, error=str(r))
+                failed.append(fid)
+        return failed
+
+    async def retrieve_file(self, file_id: str) -> Any:
+        """
+        ファイルのメタデータを取得します。
+
+        ファイル名や作成日時はファイルの存続中に変化しないため、
+        TTL の間は API を呼ばずにキャッシュを返します。
+        """
+        entry = self._file_meta_cache.get(file_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._file_meta_cache.move_to_end(file_id)
+                return entry[1]
+            del self._file_meta_cache[file_id]
+        async with self._get_client() as client:
+            f = await client.files.retrieve(file_id)
+        if self._file_meta_ttl > 0 and self._file_meta_maxsize > 0:
+            self._file_meta_cache[file_id] = (time.monotonic() + self._file_meta_ttl, f)
+            while len(self._file_meta_cache) > self._file_meta_maxsize:
+                self._file_meta_cache.popitem(last=False)
+        return f
+
+    @_invalidates_list_cache
     async def delete_file(self, file_id: str) -> bool:
+        self._file_meta_cache.pop(file_id, None)
         async with self._get_client() as client:
             res = await client.files.delete(file_id=file_id)
             return res.deleted
 
-    async def create_file_batch(self, vector_store_id: str, file_ids: List[str]) -> Any:
+    @_invalidates_list_cache
+    async def create_file_batch(self, vector_store_id: str, file_ids: list[str]) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=file_ids)
 
-    async def poll_batch_status(self, vector_store_id: str, batch_id: str, interval: float = 2.0, max_retries: int = 60) -> str:
-        for _ in range(max_retries):
-            try:
-                async with self._get_client() as client:
+    async def poll_batch_status(self, vector_store_id: str, batch_id: str, interval: float = 0.5, max_interval: float = 10.0, multiplier: float = 1.5, timeout: float = 120.0) -> str:
+        # 固定間隔ではなく、ジッター付きの指数バックオフで問い合わせ回数を抑える。
+        # 小さなファイルはすぐ完了するため初回は短く、エラー時はより速く間隔を広げる。
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = interval
+        async with self._get_client() as client:
+            while True:
+                failed = False
+                try:
                     batch = await client.vector_stores.file_batches.retrieve(vector_store_id=vector_store_id, batch_id=batch_id)
-                    if batch.status in ["completed", "failed", "cancelled"]:
+                    if batch.status in _BATCH_FINAL_STATUSES:
+                        # インデックス完了でファイル数・状態が変わるため一覧を取り直させる
+                        self._invalidate_list_cache()
                         return batch.status
-                await asyncio.sleep(interval)
-            except Exception:
-                await asyncio.sleep(interval)
-        return "timed_out"
+                except Exception as e:
+                    log.warning("ファイルバッチの状態取得に失敗しました", error=str(e))
+                    failed = True
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return "timed_out"
+                await asyncio.sleep(min(delay + random.uniform(0, delay * 0.1), remaining))
+                delay = min(delay * (2.0 if failed else multiplier), max_interval)
 
 
 # --- Application Use Cases ---
@@ -645,14 +980,15 @@ class LLMUseCase:
     def __init__(self, client: OpenAIClient):
         self.client = client
 
-    async def execute_analysis_stream(self, payload: ResponseRequestPayload, cancel_event: Optional[asyncio.Event] = None) -> AsyncGenerator[StreamResult, None]:
+    async def execute_analysis_stream(self, payload: ResponseRequestPayload, cancel_event: asyncio.Event | None = None) -> AsyncGenerator[StreamResult]:
         try:
             yield StreamTextDelta(delta=f"\n[AI ({payload.model})] 分析中...\n\n")
-            stream = self.client.stream_analysis(payload)
-            async for event in stream:
-                if cancel_event and cancel_event.is_set():
-                    break
-                yield event
+            # キャンセルで抜けた場合も、ストリームと接続をその場で閉じる
+            async with aclosing(self.client.stream_analysis(payload)) as stream:
+                async for event in stream:
+                    if cancel_event and cancel_event.is_set():
+                        break
+                    yield event
         except Exception as e:
             yield StreamError(message=str(e))
 
@@ -661,7 +997,7 @@ class RAGUseCase:
     def __init__(self, client: OpenAIClient):
         self.client = client
 
-    async def list_vector_stores(self) -> List[Any]:
+    async def list_vector_stores(self) -> list[Any]:
         return await self.client.list_vector_stores()
 
     async def create_vector_store(self, name: str) -> Any:
@@ -673,22 +1009,33 @@ class RAGUseCase:
     async def delete_vector_store(self, store_id: str) -> bool:
         return await self.client.delete_vector_store(vector_store_id=store_id)
 
-    async def list_files_in_store(self, store_id: str) -> List[dict]:
+    async def list_files_in_store(self, store_id: str) -> list[dict]:
         vs_files = await self.client.list_files_in_store(vector_store_id=store_id)
         file_details = []
         if vs_files:
-            async with self.client._get_client() as ac:
-                for vf in vs_files:
-                    try:
-                        f = await ac.files.retrieve(vf.id)
-                        file_details.append({"id": f.id, "filename": f.filename, "created_at": f.created_at})
-                    except Exception:
-                        continue
+            # ファイル毎のメタデータ取得は互いに独立しているため、同時実行数を制限して並行に行う
+            # キャッシュ済みのファイルは API を呼ばずに返るため、未取得分のみが並行リクエストになる
+            sem = asyncio.Semaphore(8)
+
+            async def _retrieve(file_id: str) -> Any:
+                async with sem:
+                    return await self.client.retrieve_file(file_id)
+
+            results = await asyncio.gather(*(_retrieve(vf.id) for vf in vs_files), return_exceptions=True)
+            for f in results:
+                if isinstance(f, BaseException):
+                    continue
+                file_details.append({"id": f.id, "filename": f.filename, "created_at": f.created_at})
         return file_details
 
     async def upload_and_index_file(self, file_path: str, store_id: str) -> None:
-        f_obj = await self.client.upload_file(file_path=file_path)
-        batch = await self.client.create_file_batch(vector_store_id=store_id, file_ids=[f_obj.id])
+        await self.upload_and_index_files([file_path], store_id)
+
+    async def upload_and_index_files(self, file_paths: list[str], store_id: str) -> None:
+        if not file_paths:
+            return
+        f_objs = await self.client.upload_files(file_paths)
+        batch = await self.client.create_file_batch(vector_store_id=store_id, file_ids=[f.id for f in f_objs])
         await self.client.poll_batch_status(vector_store_id=store_id, batch_id=batch.id)
 
     async def delete_file_from_store_and_storage(self, store_id: str, file_id: str) -> None:
@@ -696,6 +1043,16 @@ class RAGUseCase:
         await self.client.delete_file(file_id=file_id)
 
 
+# ツール/推論オプションはセッション中ほぼ不変のため、frozen なインスタンスを使い回し、
+# リクエスト毎の再生成・再バリデーションを省く
+@functools.lru_cache(maxsize=32)
+def _file_search_tool(vector_store_id: str) -> FileSearchTool:
+    return FileSearchTool(type="file_search", vector_store_ids=(vector_store_id,))
+
+@functools.lru_cache(maxsize=8)
+def _reasoning_options(effort: str) -> ReasoningOptions:
+    return ReasoningOptions(effort=effort)
+
 # --- Global Application State (ViewModel) ---
 class AppState:
     def __init__(self):
@@ -707,17 +1064,19 @@ class AppState:
         self.prompt_manager = PromptManager()
         self.available_prompt_modes = self.prompt_manager.get_all_modes()
 
-        self.on_state_change: Optional[Callable[[], Union[None, Awaitable[None]]]] = None
-        self.on_text_delta: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None
-        self.on_clear_text: Optional[Callable[[], Union[None, Awaitable[None]]]] = None
-        self.on_error: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None
-        self.on_info: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None
-        self.on_vs_updated: Optional[Callable[[List[str]], Union[None, Awaitable[None]]]] = None
+        self.on_state_change: Callable[[], None | Awaitable[None]] | None = None
+        self.on_text_delta: Callable[[str, str], None | Awaitable[None]] | None = None
+        self.on_clear_text: Callable[[], None | Awaitable[None]] | None = None
+        self.on_error: Callable[[str, str], None | Awaitable[None]] | None = None
+        self.on_info: Callable[[str, str], None | Awaitable[None]] | None = None
+        self.on_vs_updated: Callable[[list[str]], None | Awaitable[None]] | None = None
 
-        self.client: Optional[OpenAIClient] = None
-        self.llm_usecase: Optional[LLMUseCase] = None
-        self.rag_usecase: Optional[RAGUseCase] = None
+        self.client: OpenAIClient | None = None
+        self.llm_usecase: LLMUseCase | None = None
+        self.rag_usecase: RAGUseCase | None = None
         self.cancel_event: asyncio.Event = asyncio.Event()
+        # APIキー変更で差し替えられ、実行中の処理の完了を待って閉じられる旧クライアント
+        self._retiring_clients: dict[asyncio.Task[None], OpenAIClient] = {}
 
         if self.config.api_key:
             self.init_client()
@@ -750,11 +1109,38 @@ class AppState:
 
     def init_client(self):
         if self.config.api_key:
+            if self.client is not None:
+                self._retire_client()
             self.client = OpenAIClient(self.config.api_key)
             self.llm_usecase = LLMUseCase(self.client)
             self.rag_usecase = RAGUseCase(self.client)
             asyncio.create_task(self.refresh_vector_stores())
 
+    def _retire_client(self) -> None:
+        # 差し替え前のクライアントは、実行中のストリームや一覧取得が終わってから閉じる。
+        # タスクは参照を保持しないと実行途中で GC されうるため、完了まで保持する
+        client = self.client
+        task = asyncio.create_task(client.aclose(wait_idle=True))
+        self._retiring_clients[task] = client
+        task.add_done_callback(self._on_client_closed)
+
+    def _on_client_closed(self, task: asyncio.Task[None]) -> None:
+        self._retiring_clients.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("OpenAIクライアントのクローズに失敗しました", error=str(task.exception()))
+
+    async def shutdown(self) -> None:
+        # アプリ終了時は実行中の処理の完了を待たず、差し替え待ちの旧クライアントも含めて直ちに閉じる
+        clients = list(self._retiring_clients.values())
+        for task in list(self._retiring_clients):
+            task.cancel()
+        if self.client is not None:
+            clients.append(self.client)
+        results = await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                log.warning("OpenAIクライアントのクローズに失敗しました", error=str(r))
+
     def save_config(self):
         ConfigManager.save(self.config)
 
@@ -829,7 +1215,7 @@ class AppState:
                 await self._notify_error("RAGエラー", "Vector Storeが選択されていません。")
                 return
             vs_id = vs_val.split("(")[-1].strip(")") if "(" in vs_val else vs_val
-            tools = [FileSearchTool(type="file_search", vector_store_ids=[vs_id])]
+            tools = [_file_search_tool(vs_id)]
 
         self.is_processing = True
         self.status_message = f"{self.config.model} ({self.config.reasoning_effort}) で分析中..."
@@ -846,7 +1232,7 @@ class AppState:
                 model=self.config.model,
                 input=user_input,
                 instructions=system_prompt,
-                reasoning=ReasoningOptions(effort=self.config.reasoning_effort),
+                reasoning=_reasoning_options(self.config.reasoning_effort),
                 previous_response_id=prev_id,
                 tools=tools,
                 stream=True,
@@ -895,6 +1281,10 @@ class SyukatsuSupportApp:
         self.state.on_info = self._show_info
         self.state.on_vs_updated = self._update_vs_combo
 
+        # 画面が閉じられたら、共有している OpenAI クライアントの接続を閉じる
+        self.page.on_close = self._on_page_close
+        self.page.on_disconnect = self._on_page_close
+
         self.chat_list = ft.ListView(expand=True, spacing=10, auto_scroll=True)
         self.current_ai_message = None
         self.current_ai_text = ""
@@ -999,6 +1389,9 @@ class SyukatsuSupportApp:
 
         self.page.add(ft.Column([main_row, bottom_bar], expand=True))
 
+    async def _on_page_close(self, _e):
+        await self.state.shutdown()
+
     async def _sync_from_state(self):
         self.api_key_field.value = self.state.config.api_key or ""
         self.model_combo.value = self.state.config.model
@@ -1069,7 +1462,7 @@ class SyukatsuSupportApp:
         dlg.open = True
         self.page.update()
 
-    async def _update_vs_combo(self, values: List[str]):
+    async def _update_vs_combo(self, values: list[str]):
         self.vs_combo.options = [ft.dropdown.Option(v) for v in values]
         current = self.state.config.current_vector_store_id
         if current and any(current in val for val in values):
@@ -1247,10 +1640,9 @@ class SyukatsuSupportApp:
             file_picker = ft.FilePicker()
             files = await file_picker.pick_files(allow_multiple=True)
             if files:
-                for f in files:
-                    status_txt.value = f"アップロード・インデックス中: {f.name}..."
-                    self.page.update()
-                    await self.state.rag_usecase.upload_and_index_file(f.path, selected_store_id[0])
+                status_txt.value = f"アップロード・インデックス中: {', '.join(f.name for f in files)}..."
+                self.page.update()
+                await self.state.rag_usecase.upload_and_index_files([f.path for f in files], selected_store_id[0])
                 await select_store(selected_store_id[0])
 
         upload_btn = ft.ElevatedButton(
@@ -1282,15 +1674,38 @@ class SyukatsuSupportApp:
 
 
 # --- Application Main Entry Point ---
-def main(page: ft.Page) -> None:
+def _show_splash(page: ft.Page) -> ft.Control:
+    # 設定の読み込み・復号と画面の構築より先に、最小限のスプラッシュで最初のフレームを表示する
+    splash = ft.Column(
+        [ft.ProgressRing(), ft.Text("SYUKATSU Support を起動しています...", size=12)],
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        alignment=ft.MainAxisAlignment.CENTER,
+        expand=True,
+    )
+    page.add(splash)
+    return splash
+
+
+async def main(page: ft.Page) -> None:
     log.info("SYUKATSU Support App starting (Single-File Architecture)...")
+    splash = _show_splash(page)
+    # page.add() は差分を送信キューに積むだけで、ソケットへの書き込みは別タスク（送信ループ）が行う。
+    # 以降の初期化はループを止めるため、その前に1回だけ制御を返して送信ループを先に走らせる
+    await asyncio.sleep(0)
+
     try:
         state = AppState()
+        page.controls.remove(splash)
         SyukatsuSupportApp(page, state)
+        # 起動時の長寿命オブジェクトを永続世代へ移し、以降の GC 走査対象から外す
+        gc.collect()
+        gc.freeze()
     except Exception as e:
         log_crash_and_exit(e)
-        log.critical(f"Application failed to start: {e}", exc_info=True)
+        log.critical("Application failed to start", error=str(e), exc_info=True)
         err_msg = translate_api_error(e)
+        if splash in page.controls:
+            page.controls.remove(splash)
         dlg = ft.AlertDialog(
             title=ft.Text("起動エラー", color=ft.Colors.RED),
             content=ft.Text(f"起動中にエラーが発生しました:\n\n{err_msg}"),
@@ -1310,7 +1725,6 @@ if __name__ == "__main__":
             for tmp_path in flet_cache_dir.glob("*"):
                 if tmp_path.is_dir() and len(tmp_path.name.split(".")) > 3:
                     try:
-                        import shutil
                         shutil.rmtree(tmp_path, ignore_errors=True)
                     except Exception:
                         pass
@@ -1326,7 +1740,6 @@ if __name__ == "__main__":
             if attempt == max_retries - 1:
                 log_crash_and_exit(pe)
                 raise
-            import time
             time.sleep(1.5)
         except Exception as e:
             log_crash_and_exit(e)
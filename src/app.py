@@ -19,35 +19,41 @@ Syukatsu Support アプリのエントリーポイント。
 依存関係の確認、初期状態の構築、およびFletメインループの起動を行います。
 """
 
-import sys
-from pathlib import Path
-
-# uv run src/app.py 等で直接起動した場合でも 'src' モジュールが解決できるように
-# sys.path にプロジェクトのルートディレクトリを動的に追加します。
-project_root = str(Path(__file__).resolve().parent.parent)
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+import asyncio
+import gc
 
 import flet as ft
 import structlog
 
-# Initialize logger
-from src.core.logger import setup_logging
-try:
-    setup_logging()
-except Exception:
-    pass
-
 log = structlog.get_logger()
 
+def _show_splash(page: ft.Page) -> ft.Control:
+    """
+    重いモジュール（pydantic / openai / cryptography）を読み込む前に、
+    最小限のスプラッシュを描画して最初のフレームを即座に表示します。
+    """
+    splash = ft.Column(
+        [ft.ProgressRing(), ft.Text("SYUKATSU Support を起動しています...", size=12)],
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        alignment=ft.MainAxisAlignment.CENTER,
+        expand=True,
+    )
+    page.add(splash)
+    return splash
+
 
-def main(page: ft.Page) -> None:
+async def main(page: ft.Page) -> None:
     """
     Flet アプリケーションの起動ルーチン。
+    0. スプラッシュの描画（重い import より先に実行）
     1. ステート（AppState）の初期化
     2. UI（SyukatsuSupportApp）の生成
     """
     log.info("Application starting (Flet State-Driven Architecture)...")
+    splash = _show_splash(page)
+    # page.add() は差分を送信キューに積むだけで、ソケットへの書き込みは別タスク（送信ループ）が行います。
+    # 以降の重い import はループを止めるため、その前に1回だけ制御を返して送信ループを先に走らせます。
+    await asyncio.sleep(0)
 
     try:
         from src.state import AppState
@@ -57,12 +63,20 @@ def main(page: ft.Page) -> None:
         state = AppState()
         
         log.info("Initializing Flet UI...")
+        page.controls.remove(splash)
         SyukatsuSupportApp(page, state)
 
+        # 起動時に確保した長寿命オブジェクト（モジュール・モデル・UIコントロール）を
+        # 永続世代へ移し、以降の GC 走査対象から外します。
+        gc.collect()
+        gc.freeze()
+
     except Exception as e:
         from src.core.errors import translate_api_error
-        log.critical(f"Application failed to start: {e}", exc_info=True)
+        log.critical("Application failed to start", error=str(e), exc_info=True)
         err_msg = translate_api_error(e)
+        if splash in page.controls:
+            page.controls.remove(splash)
         dlg = ft.AlertDialog(
             title=ft.Text("起動エラー", color=ft.Colors.RED),
             content=ft.Text(f"アプリケーションの起動中にエラーが発生しました:\n\n{err_msg}"),
@@ -74,6 +88,23 @@ def main(page: ft.Page) -> None:
         page.update()
 
 if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    # uv run src/app.py 等で直接起動した場合でも 'src' モジュールが解決できるように
+    # sys.path にプロジェクトのルートディレクトリを動的に追加します。
+    # （モジュールとして import された場合は不要なため、直接起動時のみ実行します）
+    project_root = str(Path(__file__).resolve().parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    # Initialize logger
+    from src.core.logger import setup_logging
+    try:
+        setup_logging()
+    except Exception:
+        pass
+
     log.info("Starting Flet app...")
     # ユーザーが見るローカルのウィンドウアプリとして構築
     ft.run(main)
@@ -19,7 +19,8 @@ LLM分析の実行とストリーミング管理を担当するUseCaseモジュ
 
 import asyncio
 import structlog
-from typing import AsyncGenerator
+from contextlib import aclosing
+from collections.abc import AsyncGenerator
 
 from src.models import ResponseRequestPayload, StreamResult, StreamTextDelta, StreamError
 from src.infrastructure.openai_client import OpenAIClient
@@ -34,7 +35,7 @@ class LLMUseCase:
     def __init__(self, client: OpenAIClient):
         self.client = client
 
-    async def execute_analysis_stream(self, payload: ResponseRequestPayload, cancel_event: asyncio.Event = None) -> AsyncGenerator[StreamResult, None]:
+    async def execute_analysis_stream(self, payload: ResponseRequestPayload, cancel_event: asyncio.Event = None) -> AsyncGenerator[StreamResult]:
         """
         ストリーミング分析を実行する非同期ジェネレータ。
         
@@ -49,11 +50,12 @@ class LLMUseCase:
             start_msg = f"\n[AI ({payload.model})] analyzing...\n（数分から10分程度の時間を要する場合があります。）\n\n"
             yield StreamTextDelta(delta=start_msg)
 
-            stream = self.client.stream_analysis(payload)
-            async for event in stream:
-                if cancel_event and cancel_event.is_set():
-                    break
-                yield event
+            # キャンセルで抜けた場合も、ストリームと接続をその場で閉じる
+            async with aclosing(self.client.stream_analysis(payload)) as stream:
+                async for event in stream:
+                    if cancel_event and cancel_event.is_set():
+                        break
+                    yield event
 
         except Exception as e:
             log.exception("LLM stream failed", error=str(e))
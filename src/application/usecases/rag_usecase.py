@@ -17,12 +17,16 @@
 RAGおよびVector Storeの抽象化と管理を担当するUseCaseモジュール。
 """
 
+import asyncio
 import structlog
-from typing import List, Any
+from typing import Any
 from src.infrastructure.openai_client import OpenAIClient
 
 log = structlog.get_logger()
 
+# ファイルメタデータを並行取得する際の同時実行数の上限
+_METADATA_CONCURRENCY = 8
+
 
 class RAGUseCase:
     """
@@ -32,7 +36,7 @@ class RAGUseCase:
     def __init__(self, client: OpenAIClient):
         self.client = client
 
-    async def list_vector_stores(self) -> List[Any]:
+    async def list_vector_stores(self) -> list[Any]:
         return await self.client.list_vector_stores()
 
     async def create_vector_store(self, name: str) -> Any:
@@ -47,7 +51,7 @@ class RAGUseCase:
     async def delete_vector_store(self, store_id: str) -> bool:
         return await self.client.delete_vector_store(vector_store_id=store_id)
 
-    async def list_files_in_store(self, store_id: str) -> List[dict]:
+    async def list_files_in_store(self, store_id: str) -> list[dict]:
         """
         指定されたVector Store内のすべてのファイルのメタデータ（名前、日時、IDなど）を取得します。
         """
@@ -55,29 +59,49 @@ class RAGUseCase:
         file_details = []
         
         if vs_files:
-            async with self.client._get_client() as ac:
-                for vf in vs_files:
-                    try:
-                        f = await ac.files.retrieve(vf.id)
-                        file_details.append({
-                            "id": f.id,
-                            "filename": f.filename,
-                            "created_at": f.created_at
-                        })
-                    except Exception as e:
-                        log.warning("ファイルのメタデータの取得に失敗しました", file_id=vf.id, error=str(e))
-                        continue
+            # ファイル毎のメタデータ取得は互いに独立しているため、同時実行数を制限して並行に行う
+            # キャッシュ済みのファイルは API を呼ばずに返るため、未取得分のみが並行リクエストになる
+            sem = asyncio.Semaphore(_METADATA_CONCURRENCY)
+
+            async def _retrieve(file_id: str) -> Any:
+                async with sem:
+                    return await self.client.retrieve_file(file_id)
+
+            results = await asyncio.gather(
+                *(_retrieve(vf.id) for vf in vs_files), return_exceptions=True
+            )
+
+            for vf, f in zip(vs_files, results):
+                if isinstance(f, BaseException):
+                    log.warning("ファイルのメタデータの取得に失敗しました", file_id=vf.id, error=str(f))
+                    continue
+                file_details.append({
+                    "id": f.id,
+                    "filename": f.filename,
+                    "created_at": f.created_at
+                })
         return file_details
 
     async def upload_and_index_file(self, file_path: str, store_id: str) -> None:
         """
         ファイルをシステムにアップロードし、特定のVector Storeに関連付け（インデックス）ます。
         """
-        # Storageへのアップロード
-        f_obj = await self.client.upload_file(file_path=file_path)
+        await self.upload_and_index_files([file_path], store_id)
+
+    async def upload_and_index_files(self, file_paths: list[str], store_id: str) -> None:
+        """
+        複数ファイルを並行してアップロードし、1つのBatchジョブでVector Storeに関連付けます。
+        """
+        if not file_paths:
+            return
+
+        # Storageへのアップロード（並行実行）
+        f_objs = await self.client.upload_files(file_paths)
         
         # Batchジョブを作成して、VectorStoreに所属させる
-        batch = await self.client.create_file_batch(vector_store_id=store_id, file_ids=[f_obj.id])
+        batch = await self.client.create_file_batch(
+            vector_store_id=store_id, file_ids=[f.id for f in f_objs]
+        )
         
         # 完了するまでポーリング待機
         await self.client.poll_batch_status(vector_store_id=store_id, batch_id=batch.id)
@@ -13,8 +13,24 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import re
+
 import openai
 
+# 例外メッセージの判定用パターン（モジュール読み込み時に一度だけコンパイル）
+_LOCK_RE = re.compile(r"WinError 32|Permission denied|(?i:locked)")
+_TIMEOUT_RE = re.compile(r"APITimeoutError|(?i:timed out)")
+_KEY_FORMAT_RE = re.compile(r"ascii|ordinal not in range|codec", re.IGNORECASE)
+_AUTH_RE = re.compile(r"AuthenticationError|401|(?i:invalid_api_key)")
+_QUOTA_RE = re.compile(r"quota|billing|credit", re.IGNORECASE)
+_CONTEXT_RE = re.compile(
+    r"context_length_exceeded|maximum context length|exceeds the context window"
+    r"|string_above_max_length|too long|token limit",
+    re.IGNORECASE,
+)
+_REASONING_RE = re.compile(r"reasoning_effort|reasoning\.effort")
+
+
 def translate_api_error(e: Exception) -> str:
     """
     OpenAI APIエラーおよびシステム例外を初心者に分かりやすい丁寧な日本語メッセージに変換します。
@@ -31,7 +47,7 @@ def translate_api_error(e: Exception) -> str:
     err_str = str(e)
 
     # 1. アプリの多重起動によるロック / ファイル権限エラー
-    if isinstance(e, PermissionError) or "WinError 32" in err_str or "Permission denied" in err_str or "locked" in err_str.lower():
+    if isinstance(e, PermissionError) or _LOCK_RE.search(err_str):
         return (
             "【アプリの多重起動エラー】 (App Lock Error)\n"
             "SYUKATSU Supportがすでに別のウィンドウまたはバックグラウンドで起動しているため、設定ファイルやデータがロックされています。\n"
@@ -39,7 +55,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 2. タイムアウト
-    if isinstance(e, (openai.APITimeoutError, TimeoutError)) or "APITimeoutError" in err_str or "timed out" in err_str.lower():
+    if isinstance(e, (openai.APITimeoutError, TimeoutError)) or _TIMEOUT_RE.search(err_str):
         return (
             "【通信タイムアウト】 (APITimeoutError)\n"
             "OpenAIサーバーからの応答が制限時間を超えました。\n"
@@ -47,7 +63,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 3. APIキー形式エラー (UnicodeEncodeError / 全角文字混入など)
-    if isinstance(e, (UnicodeEncodeError, UnicodeError)) or "ascii" in err_str.lower() or "ordinal not in range" in err_str.lower() or "codec" in err_str.lower():
+    if isinstance(e, (UnicodeEncodeError, UnicodeError)) or _KEY_FORMAT_RE.search(err_str):
         return (
             "【APIキー文字エラー】 (Invalid Key Format)\n"
             "入力されたOpenAI APIキーに全角文字や全角スペースなど、使用できない文字が含まれています。\n"
@@ -56,7 +72,7 @@ def translate_api_error(e: Exception) -> str:
         )
 
     # 4. APIキーが誤っている (AuthenticationError)
-    if isinstance(e, openai.AuthenticationError) or "AuthenticationError" in err_str or "invalid_api_key" in err_str.lower() or "401" in err_str:
+    if isinstance(e, openai.AuthenticationError) or _AUTH_RE.search(err_str):
         return (
             "【APIキーエラー】 (AuthenticationError)\n"
             "入力されたOpenAI APIキーが正しくないか、無効化されています。\n"
@@ -66,7 +82,7 @@ def translate_api_error(e: Exception) -> str:
     # 4. API利用上限 / 残高不足 (RateLimitError)
     if isinstance(e, openai.RateLimitError) or "RateLimitError" in err_str:
         # クレジットの残高が不足している場合
-        if "insufficient_quota" in err_str or "quota" in err_str.lower() or "billing" in err_str.lower() or "credit" in err_str.lower():
+        if _QUOTA_RE.search(err_str):
             return (
                 "【クレジット残高不足】 (Insufficient Quota)\n"
                 "OpenAIアカウントの無料利用分が終了したか、チャージ残高が不足しています。\n"
@@ -82,14 +98,14 @@ def translate_api_error(e: Exception) -> str:
     # 5. リクエストエラー (BadRequestError) - 入力トークン上限オーバー / 推論レベルミスマッチ等
     if isinstance(e, openai.BadRequestError) or "BadRequestError" in err_str:
         # 入力トークン上限オーバー
-        if any(k in err_str.lower() for k in ["context_length_exceeded", "maximum context length", "exceeds the context window", "string_above_max_length", "too long", "token limit"]):
+        if _CONTEXT_RE.search(err_str):
             return (
                 "【入力文字数制限オーバー】 (Context Window Exceeded)\n"
                 "送信した文章または過去の会話履歴が、AIが一度に処理できる制限（トークン上限）を超えています。\n"
                 "「🧹 コンテキスト消去」ボタンを押して会話履歴をリセットするか、質問文を短くして再度お試しください。"
             )
         # 推論レベルミスマッチ
-        if "reasoning_effort" in err_str or "reasoning.effort" in err_str:
+        if _REASONING_RE.search(err_str):
             return (
                 "【モデル設定エラー】 (Reasoning Effort Error)\n"
                 "選択した推論強度が、現在のモデルでサポートされていません。\n"
@@ -25,27 +25,36 @@ import logging
 import structlog
 import sys
 
+# WindowsコンソールでのUnicodeEncodeErrorを防ぐため、標準出力をUTF-8に強制
+# （POSIX では既にUTF-8のため不要。import時に一度だけ実行する）
+# --noconsole ビルドでは sys.stdout が None になるため、その場合も何もしない
+if sys.platform == "win32" and sys.stdout and hasattr(sys.stdout, "reconfigure"):
+    try:
+        sys.stdout.reconfigure(encoding="utf-8")
+    except Exception:
+        pass
+
 def setup_logging() -> None:
     """
     structlogを使用してアプリケーションのルートロガーを設定します。
     
     これにより、観測性（Observability）向上のための構造化ロギングが初期化されます。
     """
-    # WindowsコンソールでのUnicodeEncodeErrorを防ぐため、標準出力をUTF-8に強制
-    if sys.stdout and hasattr(sys.stdout, "reconfigure"):
-        try:
-            sys.stdout.reconfigure(encoding="utf-8")
-        except Exception:
-            pass
+    # 配布用のビルド（PyInstaller等でfrozen）では、色付け・整形のコストが高い
+    # ConsoleRendererではなく、1行JSONを出力する軽量なJSONRendererを使用
+    if getattr(sys, "frozen", False):
+        renderer = structlog.processors.JSONRenderer(ensure_ascii=False)
+    else:
+        renderer = structlog.dev.ConsoleRenderer()
 
     structlog.configure(
         processors=[
             structlog.processors.add_log_level,
             structlog.processors.TimeStamper(fmt="iso"),
-            structlog.dev.ConsoleRenderer(),
+            renderer,
         ],
         wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         context_class=dict,
         logger_factory=structlog.PrintLoggerFactory(),
-        cache_logger_on_first_use=False
+        cache_logger_on_first_use=True
     )
\ No newline at end of file
@@ -20,11 +20,13 @@
 トークン使用量に基づくコスト見積もりに使用されます。
 """
 
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ModelPricing:
     """
     OpenAIモデルの料金構造（100万トークンあたり）。
@@ -46,7 +48,8 @@ class ModelPricing:
 # 'Standard' ティアに基づく料金テーブル
 # 価格は100万トークンあたりのUSDです。
 # Note: これらの値は、最新のOpenAIの料金ページに合わせて更新する必要があります。
-PRICING_TABLE: Dict[str, ModelPricing] = {
+# ModelPricing と同様、実行中に書き換えられないよう読み取り専用ビューとして公開します。
+PRICING_TABLE: Mapping[str, ModelPricing] = MappingProxyType({
     # GPT-5.6 Series
     "gpt-5.6-sol": ModelPricing(
         input_price=5.00,
@@ -85,7 +88,7 @@ PRICING_TABLE: Dict[str, ModelPricing] = {
         output_price=0.600,
         cached_input_price=0.075
     )
-}
+})
 
 class CostCalculator:
     """Provides methods for calculating API usage costs."""
@@ -100,28 +103,27 @@ class CostCalculator:
         if isinstance(usage_event, str):
             return f"Cost: $0.00000 | {usage_event}"
 
+        pricing = PRICING_TABLE.get(model_name)
+        if not pricing:
+            return f"Cost: Unknown Model ({model_name})"
+
         try:
             # We expect a StreamUsage object which has our defined keys
             prompt_tokens = getattr(usage_event, "input_tokens", 0)
             completion_tokens = getattr(usage_event, "output_tokens", 0)
             cached_tokens = getattr(usage_event, "cached_tokens", 0)
 
-            pricing = PRICING_TABLE.get(model_name)
-            if not pricing:
-                return f"Cost: Unknown Model ({model_name})"
-
             # Prevent double charging for cached tokens
             uncached_prompt_tokens = max(0, prompt_tokens - cached_tokens)
 
+            # 単価は100万トークンあたりのため、合算してから一度だけ割る
             cost = (
-                (uncached_prompt_tokens / 1_000_000) * pricing.input_price +
-                (cached_tokens / 1_000_000) * pricing.cached_input_price +
-                (completion_tokens / 1_000_000) * pricing.output_price
-            )
+                uncached_prompt_tokens * pricing.input_price +
+                cached_tokens * pricing.cached_input_price +
+                completion_tokens * pricing.output_price
+            ) / 1_000_000
 
             return f"Cost: ${cost:.5f} | In: {prompt_tokens} (Cache: {cached_tokens}) | Out: {completion_tokens}"
-            
-        except AttributeError:
-             return "Cost: Data Unreadable"
+
         except Exception as e:
             return f"Cost Error: {str(e)}"
\ No newline at end of file
@@ -21,9 +21,10 @@
 """
 
 import json
+import os
 import structlog
 from pathlib import Path
-from typing import Dict, Final
+from typing import Final
 
 log = structlog.get_logger()
 
@@ -41,29 +42,31 @@ class PromptManager:
     def __init__(self, filepath: str = "system_prompts.json"):
         from src.core.utils import get_resource_path
         self.filepath = get_resource_path(filepath)
-        self._prompts: Dict[str, str] = {}
+        self._prompts: dict[str, str] = {}
         self._load()
 
     def _load(self):
-        if self.filepath.exists():
-            try:
-                with self.filepath.open("r", encoding="utf-8") as f:
-                    self._prompts = json.load(f)
-                return
-            except Exception as e:
-                log.error("Failed to read prompt JSON", error=str(e))
-        else:
+        # exists() による事前の stat を省き、一度の読み込みで判定する
+        try:
+            self._prompts = json.loads(self.filepath.read_bytes())
+        except FileNotFoundError:
             log.warning(f"Prompt JSON file not found: {self.filepath}")
             # 本番ファイルが存在しない場合の最小限のフェイルセーフ
             self._prompts = {
                 MODE_FINANCIAL: "設定ファイルが見つかりません。",
                 MODE_NO_PROMPT: ""
             }
+        except Exception as e:
+            log.error("Failed to read prompt JSON", error=str(e))
 
     def save(self):
         try:
-            with self.filepath.open("w", encoding="utf-8") as f:
-                json.dump(self._prompts, f, ensure_ascii=False, indent=2)
+            # 書き込み途中で終了してもプロンプト定義が壊れないよう、一時ファイル経由で置き換える
+            tmp_path = self.filepath.with_name(self.filepath.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps(self._prompts, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp_path, self.filepath)
         except Exception as e:
             log.error("Failed to save prompt JSON", error=str(e))
 
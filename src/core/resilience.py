@@ -19,7 +19,8 @@
 
 import logging
 import structlog
-from typing import Any, Callable, TypeVar, Coroutine
+from typing import Any, TypeVar
+from collections.abc import Callable, Coroutine
 from functools import wraps
 
 import openai
@@ -58,9 +59,11 @@ def resilient_api_call() -> Callable[[Callable[..., Coroutine[Any, Any, T]]], Ca
     )
 
     def decorator(func: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., Coroutine[Any, Any, T]]:
+        # リトライ用のラッパーは装飾時に一度だけ生成する（tenacity は呼び出し毎に状態を複製する）
+        retrying_func = tenacity_retry(func)
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> T:
-            retrying_func = tenacity_retry(func)
             return await retrying_func(*args, **kwargs)
         return wrapper
 
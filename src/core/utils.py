@@ -4,10 +4,9 @@
 
 import sys
 from pathlib import Path
-from typing import Union
 
 
-def get_resource_path(relative_path: Union[str, Path]) -> Path:
+def get_resource_path(relative_path: str | Path) -> Path:
     """
     PyInstaller実行時 (sys._MEIPASS) と通常開発時 (ローカルパス) の
     両方で正しくリソース絶対パスを取得する共通ヘルパー関数。
@@ -21,9 +21,17 @@ AsyncOpenAI を用いた Responses API および RAG (File/VectorStore) 管理
 """
 
 import asyncio
+import functools
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from contextlib import aclosing, asynccontextmanager, suppress
+from types import MappingProxyType
 import structlog
 from pathlib import Path
-from typing import Any, AsyncGenerator, List, Optional
+from typing import Any, ClassVar, Self
+from collections.abc import AsyncGenerator
 from openai import AsyncOpenAI, OpenAIError, NotFoundError
 from openai.types import FileObject
 from pydantic import ValidationError
@@ -41,28 +49,201 @@ from src.core.resilience import resilient_api_call
 
 log = structlog.get_logger()
 
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+# ストリームのテキスト差分をまとめて UI に渡す単位（件数 / 秒）
+_DELTA_FLUSH_CHUNKS = 8
+_DELTA_FLUSH_INTERVAL = 0.016
+
+
+async def _coalesce_text_deltas(
+    results: AsyncGenerator[StreamResult],
+    max_chunks: int = _DELTA_FLUSH_CHUNKS,
+    interval: float = _DELTA_FLUSH_INTERVAL,
+) -> AsyncGenerator[StreamResult]:
+    """
+    短時間に連続するテキスト差分を1つの StreamTextDelta にまとめます。
+
+    UI はトークン毎に再描画するため、max_chunks 件溜まった時点、または最初の差分を
+    受け取ってから interval 秒が経過した時点でまとめて渡します。期限はタイマーで判定するため、
+    モデルの出力が途切れても溜めた差分が次のイベントまで滞留することはありません。
+    テキスト以外のイベント（エラーを含む）やストリームの終了時には、溜めた差分を先に送出します。
+    """
+    buf: list[str] = []
+    deadline = 0.0
+    it = aiter(results)
+    pending: asyncio.Future[StreamResult] | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(it))
+            if buf:
+                # 次のイベントを待つのは、先頭の差分を溜めてから interval 秒後まで
+                done, _ = await asyncio.wait({pending}, timeout=max(deadline - time.monotonic(), 0))
+                if not done:
+                    yield StreamTextDelta(delta="".join(buf))
+                    buf.clear()
+                    continue
+            try:
+                result = await pending
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            if isinstance(result, StreamTextDelta):
+                if not buf:
+                    deadline = time.monotonic() + interval
+                buf.append(result.delta)
+                if len(buf) >= max_chunks:
+                    yield StreamTextDelta(delta="".join(buf))
+                    buf.clear()
+                continue
+            if buf:
+                yield StreamTextDelta(delta="".join(buf))
+                buf.clear()
+            yield result
+        if buf:
+            yield StreamTextDelta(delta="".join(buf))
+    finally:
+        # 途中で閉じられた場合は、読み取り待ちのタスクを終わらせてから元のストリームも閉じ、
+        # 接続（_get_client の利用）を GC まで保持させない
+        if pending is not None:
+            pending.cancel()
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+        await it.aclose()
+
+
+def _coalesce_inflight(func):
+    """同じ引数で同時に呼ばれた一覧取得を、実行中の1つのリクエストにまとめるデコレータ。"""
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> list[Any]:
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(self, *args, **kwargs))
+            self._inflight[key] = task
+
+            def _done(t: asyncio.Future[list[Any]]) -> None:
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                if not t.cancelled():
+                    t.exception()  # 待機者がいなくても未取得の例外として警告させない
+
+            task.add_done_callback(_done)
+        # 呼び出し元のキャンセルが、相乗りしている他の呼び出しに波及しないよう shield する
+        return list(await asyncio.shield(task))
+    return wrapper
+
+
+def _invalidates_list_cache(func):
+    """更新系の操作の後（失敗時も含む）に、一覧取得のキャッシュを破棄するデコレータ。"""
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            self._invalidate_list_cache()
+    return wrapper
+
 
 class OpenAIClient:
     """
     OpenAI の非同期クライアントをラップし、Responses API と RAG の機能を提供します。
     """
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        list_cache_ttl: float = 5.0,
+        file_meta_ttl: float = 600.0,
+        file_meta_maxsize: int = 512,
+    ):
         self.api_key = api_key
+        self._client: AsyncOpenAI | None = None
+        # _get_client() を使用中の処理数。0 になると _idle がセットされる
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # 一覧取得（Vector Store / ファイル）の短期キャッシュ: key -> (有効期限, 結果)
+        self._list_cache_ttl = list_cache_ttl
+        self._list_cache: dict[tuple[Any, ...], tuple[float, list[Any]]] = {}
+        self._list_cache_gen = 0
+        # 実行中の一覧取得リクエスト（同時呼び出しの重複排除用）
+        self._inflight: dict[tuple[Any, ...], asyncio.Future[list[Any]]] = {}
+        # ファイルメタデータ（名前・作成日時は不変）のキャッシュ: file_id -> (有効期限, FileObject)
+        # 多数の Store を閲覧しても増え続けないよう、最大件数を超えたら最も古く使われたものから破棄する
+        self._file_meta_ttl = file_meta_ttl
+        self._file_meta_maxsize = file_meta_maxsize
+        self._file_meta_cache: OrderedDict[str, tuple[float, FileObject]] = OrderedDict()
+
+    @asynccontextmanager
+    async def _get_client(self) -> AsyncGenerator[AsyncOpenAI]:
+        # 接続プール（TCP/TLS セッション）を使い回すため、AsyncOpenAI は1つだけ生成して共有する。
+        # ここでは close せず、破棄は aclose() で行う。
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        self._active += 1
+        self._idle.clear()
+        try:
+            yield self._client
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+    async def aclose(self, wait_idle: bool = False) -> None:
+        """
+        共有している AsyncOpenAI クライアントの接続を閉じます。
+
+        wait_idle=True の場合は、実行中のリクエスト（ストリームを含む）がすべて終わるのを待ってから閉じます。
+        """
+        if wait_idle:
+            await self._idle.wait()
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    def _get_cached_list(self, key: tuple[Any, ...]) -> list[Any] | None:
+        entry = self._list_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._list_cache[key]
+            return None
+        return list(value)
+
+    def _set_cached_list(self, key: tuple[Any, ...], value: list[Any], gen: int) -> None:
+        # 取得中に更新系の操作が挟まった場合、その結果は古い可能性があるためキャッシュしない
+        if self._list_cache_ttl > 0 and gen == self._list_cache_gen:
+            self._list_cache[key] = (time.monotonic() + self._list_cache_ttl, list(value))
 
-    def _get_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(api_key=self.api_key)
+    def _invalidate_list_cache(self) -> None:
+        self._list_cache_gen += 1
+        self._list_cache.clear()
+        self._inflight.clear()
 
     # --- Responses API ---
 
     async def stream_analysis(
-        self, payload: ResponseRequestPayload
-    ) -> AsyncGenerator[StreamResult, None]:
+        self, payload: ResponseRequestPayload, coalesce: bool = True
+    ) -> AsyncGenerator[StreamResult]:
         try:
             request_params = payload.model_dump(exclude_none=True)
             log.info("Starting async stream analysis", model=payload.model)
 
-            async for result in self._execute_stream(request_params):
-                yield result
+            results = self._execute_stream(request_params)
+            if coalesce:
+                results = _coalesce_text_deltas(results)
+            async with aclosing(results):
+                async for result in results:
+                    yield result
 
         except Exception as e:
             log.exception("Unexpected error in stream_analysis", error=str(e))
@@ -72,7 +253,7 @@ class OpenAIClient:
     async def _create_stream(self, client: AsyncOpenAI, request_params: dict) -> Any:
         return await client.responses.create(**request_params)
 
-    async def _execute_stream(self, request_params: dict) -> AsyncGenerator[StreamResult, None]:
+    async def _execute_stream(self, request_params: dict) -> AsyncGenerator[StreamResult]:
         try:
             async with self._get_client() as client:
                 stream = await self._create_stream(client, request_params)
@@ -90,97 +271,144 @@ class OpenAIClient:
             msg = translate_api_error(e)
             yield StreamError(message=f"\n{msg}")
 
-    def _process_event(self, event: Any) -> Optional[StreamResult]:
-        event_type = getattr(event, "type", None)
-        if not event_type:
-            return None
+    def _process_event(self, event: Any) -> StreamResult | None:
+        # イベント種別ごとの処理を辞書で引き、比較の連鎖を通さずに振り分ける
+        handler = self._EVENT_HANDLERS.get(getattr(event, "type", None))
+        return handler(self, event) if handler else None
 
-        if event_type == "response.output_text.delta":
-            delta_content = getattr(event, "delta", None)
-            return StreamTextDelta(delta=delta_content) if delta_content else None
-            
-        elif event_type == "response.reasoning_text.delta":
-            delta_content = getattr(event, "delta", None)
-            # Display reasoning text with a subtle marker or just as normal text
-            return StreamTextDelta(delta=delta_content) if delta_content else None
-            
-        elif event_type == "response.created":
-            response_obj = getattr(event, "response", None)
-            if response_obj and hasattr(response_obj, "id"):
-                return StreamResponseCreated(response_id=response_obj.id)
-            
-        elif event_type == "response.completed":
-            response_obj = getattr(event, "response", None)
-            if not response_obj:
-                return None
-            usage_obj = getattr(response_obj, "usage", None)
-            if not usage_obj:
-                return None
-            
-            input_tokens = getattr(usage_obj, "input_tokens", 0)
-            output_tokens = getattr(usage_obj, "output_tokens", 0)
-            total_tokens = getattr(usage_obj, "total_tokens", 0)
-            
-            cached_tokens = 0
-            input_details = getattr(usage_obj, "input_tokens_details", None)
-            if input_details:
-                cached_tokens = getattr(input_details, "cached_tokens", 0)
-                
-            return StreamUsage(
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_tokens=total_tokens,
-                cached_tokens=cached_tokens,
-            )
-            
-        elif event_type == "error":
-            error_obj = getattr(event, "error", None)
-            msg = "Unknown stream error"
-            if error_obj:
-                msg = getattr(error_obj, "message", str(error_obj))
-            translated = translate_api_error(Exception(msg))
-            return StreamError(message=f"\n{translated}")
+    def _handle_text_delta(self, event: Any) -> StreamResult | None:
+        delta_content = getattr(event, "delta", None)
+        return StreamTextDelta(delta=delta_content) if delta_content else None
 
+    def _handle_response_created(self, event: Any) -> StreamResult | None:
+        response_obj = getattr(event, "response", None)
+        if response_obj and hasattr(response_obj, "id"):
+            return StreamResponseCreated(response_id=response_obj.id)
         return None
 
+    def _handle_response_completed(self, event: Any) -> StreamResult | None:
+        response_obj = getattr(event, "response", None)
+        if not response_obj:
+            return None
+        usage_obj = getattr(response_obj, "usage", None)
+        if not usage_obj:
+            return None
+        
+        input_tokens = getattr(usage_obj, "input_tokens", 0)
+        output_tokens = getattr(usage_obj, "output_tokens", 0)
+        total_tokens = getattr(usage_obj, "total_tokens", 0)
+        
+        cached_tokens = 0
+        input_details = getattr(usage_obj, "input_tokens_details", None)
+        if input_details:
+            cached_tokens = getattr(input_details, "cached_tokens", 0)
+            
+        return StreamUsage(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=total_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+    def _handle_error_event(self, event: Any) -> StreamResult | None:
+        error_obj = getattr(event, "error", None)
+        msg = "Unknown stream error"
+        if error_obj:
+            msg = getattr(error_obj, "message", str(error_obj))
+        translated = translate_api_error(Exception(msg))
+        return StreamError(message=f"\n{translated}")
+
+    # イベント種別 -> 処理関数。実行中に書き換えられないよう読み取り専用ビューとして保持する
+    _EVENT_HANDLERS: ClassVar[Mapping[str, Callable[..., StreamResult | None]]] = MappingProxyType({
+        "response.output_text.delta": _handle_text_delta,
+        # Display reasoning text with a subtle marker or just as normal text
+        "response.reasoning_text.delta": _handle_text_delta,
+        "response.created": _handle_response_created,
+        "response.completed": _handle_response_completed,
+        "error": _handle_error_event,
+    })
+
     # --- RAG: Vector Stores ---
 
+    async def iter_vector_stores(self, page_size: int = 20) -> AsyncGenerator[Any]:
+        """
+        Vector Store を1件ずつ返します。
+
+        SDK の自動ページネーションにより、必要になった時点で次のページを取得します。
+        """
+        async with self._get_client() as client:
+            async for vs in client.vector_stores.list(limit=page_size):
+                yield vs
+
+    @_coalesce_inflight
     @resilient_api_call()
-    async def list_vector_stores(self, limit: int = 20) -> List[Any]:
+    async def list_vector_stores(self, limit: int = 20) -> list[Any]:
         try:
-            async with self._get_client() as client:
-                res = await client.vector_stores.list(limit=limit)
-                return list(res.data)
+            key = ("vector_stores", limit)
+            cached = self._get_cached_list(key)
+            if cached is not None:
+                return cached
+            gen = self._list_cache_gen
+            # limit は1ページあたりの件数。先頭ページで打ち切らず、全件を取得する
+            stores = [vs async for vs in self.iter_vector_stores(page_size=limit)]
+            self._set_cached_list(key, stores, gen)
+            return stores
         except Exception as e:
             log.error("Failed to list vector stores", error=str(e))
             return []
 
     @resilient_api_call()
+    @_invalidates_list_cache
     async def create_vector_store(self, name: str) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.create(name=name)
 
     @resilient_api_call()
+    @_invalidates_list_cache
     async def update_vector_store(self, vector_store_id: str, name: str) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.update(vector_store_id=vector_store_id, name=name)
 
     @resilient_api_call()
+    @_invalidates_list_cache
     async def delete_vector_store(self, vector_store_id: str) -> bool:
         async with self._get_client() as client:
             res = await client.vector_stores.delete(vector_store_id=vector_store_id)
             return res.deleted
 
+    async def iter_files_in_store(
+        self, vector_store_id: str, page_size: int = 100
+    ) -> AsyncGenerator[Any]:
+        """
+        Vector Store 内のファイルを1件ずつ返します。
+
+        SDK の自動ページネーションにより、必要になった時点で次のページを取得します。
+        page_size は API の上限 (100) を既定とし、往復回数を抑えます。
+        """
+        async with self._get_client() as client:
+            async for f in client.vector_stores.files.list(
+                vector_store_id=vector_store_id, limit=page_size
+            ):
+                yield f
+
+    @_coalesce_inflight
     @resilient_api_call()
-    async def list_files_in_store(self, vector_store_id: str) -> List[Any]:
+    async def list_files_in_store(self, vector_store_id: str) -> list[Any]:
+        key = ("files", vector_store_id)
+        cached = self._get_cached_list(key)
+        if cached is not None:
+            return cached
+        gen = self._list_cache_gen
         try:
-            async with self._get_client() as client:
-                res = await client.vector_stores.files.list(vector_store_id=vector_store_id)
-                return list(res.data)
+            files = [f async for f in self.iter_files_in_store(vector_store_id)]
         except NotFoundError:
-            return []
+            # 削除済みの Store に問い合わせを繰り返さないよう、404 の結果（空）もキャッシュする
+            files = []
+        self._set_cached_list(key, files, gen)
+        return files
 
     @resilient_api_call()
+    @_invalidates_list_cache
     async def delete_file_from_store(self, vector_store_id: str, file_id: str) -> bool:
         async with self._get_client() as client:
             res = await client.vector_stores.files.delete(
@@ -193,40 +421,134 @@ class OpenAIClient:
     @resilient_api_call()
     async def upload_file(self, file_path: str, purpose: str = "assistants") -> FileObject:
         path_obj = Path(file_path)
-        if not path_obj.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
 
+        # 大きなファイルの読み込みでイベントループを止めないよう、ディスクI/Oはスレッドで行う。
+        # 存在確認も読み込みの失敗で判定し、ループ上でのファイルシステム呼び出しを残さない
+        try:
+            data = await asyncio.to_thread(path_obj.read_bytes)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
         async with self._get_client() as client:
-            with path_obj.open("rb") as f:
-                res = await client.files.create(file=f, purpose=purpose)
+            res = await client.files.create(file=(path_obj.name, data), purpose=purpose)
             return res
 
+    async def upload_files(
+        self, file_paths: list[str], purpose: str = "assistants", concurrency: int = 4
+    ) -> list[FileObject]:
+        """
+        複数ファイルを並行してアップロードします。
+
+        同時実行数はセマフォで制限します。いずれかが失敗した場合は、
+        アップロード済みのファイルを削除してから最初の例外を送出します。
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _upload_one(path: str) -> FileObject:
+            async with sem:
+                return await self.upload_file(path, purpose=purpose)
+
+        results = await asyncio.gather(
+            *(_upload_one(p) for p in file_paths), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.delete_files(
+                [r.id for r in results if not isinstance(r, BaseException)],
+                concurrency=concurrency,
+            )
+            raise errors[0]
+        return results
+
+    async def delete_files(self, file_ids: list[str], concurrency: int = 4) -> list[str]:
+        """
+        複数ファイルを並行して削除します。
+
+        個々の失敗は記録して続行し、削除できなかったファイルIDの一覧を返します。
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _delete_one(file_id: str) -> bool:
+            async with sem:
+                return await self.delete_file(file_id)
+
+        results = await asyncio.gather(
+            *(_delete_one(fid) for fid in file_ids), return_exceptions=True
+        )
+        failed = []
+        for fid, r in zip(file_ids, results):
+            if isinstance(r, BaseException):
+                log.warning("Failed to delete file", file_id=fid, error=str(r))
+                failed.append(fid)
+        return failed
+
+    async def retrieve_file(self, file_id: str) -> FileObject:
+        """
+        ファイルのメタデータを取得します。
+
+        ファイル名や作成日時はファイルの存続中に変化しないため、
+        TTL の間は API を呼ばずにキャッシュを返します。
+        """
+        entry = self._file_meta_cache.get(file_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._file_meta_cache.move_to_end(file_id)
+                return entry[1]
+            del self._file_meta_cache[file_id]
+        async with self._get_client() as client:
+            f = await client.files.retrieve(file_id)
+        if self._file_meta_ttl > 0 and self._file_meta_maxsize > 0:
+            self._file_meta_cache[file_id] = (time.monotonic() + self._file_meta_ttl, f)
+            while len(self._file_meta_cache) > self._file_meta_maxsize:
+                self._file_meta_cache.popitem(last=False)
+        return f
+
     @resilient_api_call()
+    @_invalidates_list_cache
     async def delete_file(self, file_id: str) -> bool:
+        self._file_meta_cache.pop(file_id, None)
         async with self._get_client() as client:
             res = await client.files.delete(file_id=file_id)
             return res.deleted
 
     @resilient_api_call()
-    async def create_file_batch(self, vector_store_id: str, file_ids: List[str]) -> Any:
+    @_invalidates_list_cache
+    async def create_file_batch(self, vector_store_id: str, file_ids: list[str]) -> Any:
         async with self._get_client() as client:
             return await client.vector_stores.file_batches.create(
                 vector_store_id=vector_store_id, file_ids=file_ids
             )
 
     async def poll_batch_status(
-        self, vector_store_id: str, batch_id: str, interval: float = 2.0, max_retries: int = 60
+        self,
+        vector_store_id: str,
+        batch_id: str,
+        interval: float = 0.5,
+        max_interval: float = 10.0,
+        multiplier: float = 1.5,
+        timeout: float = 120.0,
     ) -> str:
-        for _ in range(max_retries):
-            try:
-                async with self._get_client() as client:
+        # 固定間隔ではなく、ジッター付きの指数バックオフで問い合わせ回数を抑える。
+        # 小さなファイルはすぐ完了するため初回は短く、エラー時はより速く間隔を広げる。
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = interval
+        async with self._get_client() as client:
+            while True:
+                failed = False
+                try:
                     batch = await client.vector_stores.file_batches.retrieve(
                         vector_store_id=vector_store_id, batch_id=batch_id
                     )
-                    if batch.status in ["completed", "failed", "cancelled"]:
+                    if batch.status in _BATCH_FINAL_STATUSES:
+                        # インデックス完了でファイル数・状態が変わるため一覧を取り直させる
+                        self._invalidate_list_cache()
                         return batch.status
-                await asyncio.sleep(interval)
-            except Exception:
-                await asyncio.sleep(interval)
-        return "timed_out"
-
+                except Exception as e:
+                    log.warning("Failed to poll file batch status", error=str(e))
+                    failed = True
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return "timed_out"
+                await asyncio.sleep(min(delay + random.uniform(0, delay * 0.1), remaining))
+                delay = min(delay * (2.0 if failed else multiplier), max_interval)
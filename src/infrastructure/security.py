@@ -20,15 +20,15 @@ APIキーの安全な暗号化/復号化（Fernet）および
 設定ファイル（config.json）の読み書きを処理します。
 """
 
+import functools
 import json
 import os
 import structlog
 from pathlib import Path
-from typing import Dict, Any, Optional
-from cryptography.fernet import Fernet, InvalidToken
+from typing import Any
 from pydantic import ValidationError
 
-from src.models import UserConfig, AppConfigDefaults
+from src.models import UserConfig
 
 log = structlog.get_logger()
 
@@ -38,23 +38,40 @@ os.makedirs(_app_data_dir, exist_ok=True)
 CONFIG_FILE = Path(_app_data_dir) / "config.json"
 KEY_FILE = Path(_app_data_dir) / ".secret.key"
 
+# 起動のたびにデフォルトへ戻す設定項目
+_RESET_ON_LOAD_KEYS = ("model", "reasoning_effort", "system_prompt_mode", "last_response_id")
+
 
 class SecurityManager:
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _get_or_create_key() -> bytes:
-        if KEY_FILE.exists():
-            try:
-                return KEY_FILE.read_bytes()
-            except IOError as e:
-                log.error("キーファイルの読み込みに失敗しました", error=str(e), path=str(KEY_FILE))
-                raise
+        # exists() で事前確認せず、読み込みを直接試みる (EAFP)
+        try:
+            return KEY_FILE.read_bytes()
+        except FileNotFoundError:
+            pass
+        except IOError as e:
+            log.error("キーファイルの読み込みに失敗しました", error=str(e), path=str(KEY_FILE))
+            raise
+
+        from cryptography.fernet import Fernet
 
         log.info("新しい暗号化キーを生成しています。")
         key = Fernet.generate_key()
         try:
-            KEY_FILE.write_bytes(key)
-            if os.name == "posix":
-                KEY_FILE.chmod(0o600)
+            # 書き込み途中で終了してキーが壊れる（= 保存済みAPIキーが復号できなくなる）ことを防ぐため、
+            # 作成時から所有者のみ読み書きできる一時ファイルに書いてから置き換える
+            tmp_file = KEY_FILE.with_name(KEY_FILE.name + ".tmp")
+            tmp_file.unlink(missing_ok=True)  # 前回の中断で残った一時ファイル
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(key)
+                os.replace(tmp_file, KEY_FILE)
+            except OSError:
+                tmp_file.unlink(missing_ok=True)
+                raise
         except IOError as e:
             log.critical("暗号化キーの保存に失敗しました", error=str(e), path=str(KEY_FILE))
             raise
@@ -65,75 +82,111 @@ class SecurityManager:
         if not plain_text:
             return ""
         try:
-            fernet = Fernet(cls._get_or_create_key())
+            fernet = _get_fernet()
             return fernet.encrypt(plain_text.encode("utf-8")).decode("utf-8")
         except Exception as e:
             log.error("暗号化に失敗しました", error=str(e))
             return ""
 
     @classmethod
-    def decrypt(cls, cipher_text: str) -> Optional[str]:
+    def decrypt(cls, cipher_text: str) -> str | None:
         if not cipher_text:
             return None
         try:
-            fernet = Fernet(cls._get_or_create_key())
+            fernet = _get_fernet()
             return fernet.decrypt(cipher_text.encode("utf-8")).decode("utf-8")
-        except (InvalidToken, Exception) as e:
+        except Exception as e:  # InvalidToken を含む
             log.warning("復号化に失敗しました", error=str(e))
             return None
 
 
+@functools.lru_cache(maxsize=1)
+def _get_fernet():
+    # cryptography (OpenSSL バインディング) は初回の暗号化/復号時まで読み込まない。
+    # キー読み込みと Fernet の初期化もプロセス内で一度だけ行う。
+    from cryptography.fernet import Fernet
+
+    return Fernet(SecurityManager._get_or_create_key())
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    # 更新時刻とサイズで、前回の保存以降にファイルが変更されていないかを判定する
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 class ConfigManager:
+    # 最後に保存した (保存先, 設定内容, ファイルの更新時刻とサイズ)。
+    # 内容もファイルも変わっていなければ書き込みを省略する
+    _last_saved: tuple[Path, dict[str, Any], tuple[int, int]] | None = None
+
     @staticmethod
     def load() -> UserConfig:
-        config_data: Dict[str, Any] = {}
+        config_data: dict[str, Any] = {}
 
-        if CONFIG_FILE.exists():
-            try:
-                with CONFIG_FILE.open("r", encoding="utf-8") as f:
-                    file_data = json.load(f)
+        # exists() で事前確認せず、読み込みを直接試みる (EAFP)
+        try:
+            file_data = json.loads(CONFIG_FILE.read_bytes())
 
-                encrypted_key = file_data.get("encrypted_api_key")
-                if encrypted_key:
-                    decrypted_key = SecurityManager.decrypt(encrypted_key)
-                    if decrypted_key:
-                        file_data["api_key"] = decrypted_key
-                    else:
-                        file_data["api_key"] = None
+            encrypted_key = file_data.get("encrypted_api_key")
+            if encrypted_key:
+                decrypted_key = SecurityManager.decrypt(encrypted_key)
+                if decrypted_key:
+                    file_data["api_key"] = decrypted_key
+                else:
+                    file_data["api_key"] = None
 
-                file_data.pop("encrypted_api_key", None)
-                config_data = file_data
+            file_data.pop("encrypted_api_key", None)
+            config_data = file_data
 
-            except Exception as e:
-                log.error("設定ファイルの読み込みに失敗しました", error=str(e), path=str(CONFIG_FILE))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.error("設定ファイルの読み込みに失敗しました", error=str(e), path=str(CONFIG_FILE))
 
         env_key = os.getenv("OPENAI_API_KEY")
         if env_key:
             config_data["api_key"] = env_key
 
         # 環境のリセット（高コストモデル防止）
-        config_data["model"] = AppConfigDefaults.DEFAULT_MODEL
-        config_data["reasoning_effort"] = AppConfigDefaults.DEFAULT_REASONING
-        config_data["system_prompt_mode"] = "有価証券報告書 -財務分析-"
-        config_data["last_response_id"] = None
+        # 保存値を取り除き、UserConfig の Field(default=...) に任せる
+        for key in _RESET_ON_LOAD_KEYS:
+            config_data.pop(key, None)
 
         try:
-            return UserConfig(**config_data)
+            return UserConfig.model_validate(config_data)
         except ValidationError as e:
             log.error("設定のバリデーションに失敗しました", error=str(e))
             return UserConfig()
 
     @staticmethod
     def save(config: UserConfig) -> None:
+        snapshot = config.model_dump()
+        last = ConfigManager._last_saved
+        # 設定ファイルが削除・外部で編集された場合は、内容が同じでも書き直す
+        if last is not None and last[:2] == (CONFIG_FILE, snapshot) and last[2] == _file_signature(CONFIG_FILE):
+            return
+
         try:
             data = config.model_dump(exclude={"api_key"})
+            key_saved = True
             if config.api_key:
                 encrypted = SecurityManager.encrypt(config.api_key)
                 if encrypted:
                     data["encrypted_api_key"] = encrypted
-
-            with CONFIG_FILE.open("w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
+                else:
+                    key_saved = False
+
+            # 書き込み途中で終了しても設定ファイルが壊れないよう、一時ファイル経由で置き換える
+            tmp_file = CONFIG_FILE.with_name(CONFIG_FILE.name + ".tmp")
+            tmp_file.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_file, CONFIG_FILE)
+            # APIキーを暗号化できずに保存できなかった場合は、次回の保存で再試行させる
+            signature = _file_signature(CONFIG_FILE)
+            ConfigManager._last_saved = (CONFIG_FILE, snapshot, signature) if key_saved and signature else None
 
             log.info("設定が正常に保存されました。", path=str(CONFIG_FILE))
         except IOError as e:
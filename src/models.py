@@ -18,11 +18,12 @@
 
 このモジュールはアプリケーション全体で使用されるPydantic V2モデルを集約します。
 設定（UserConfig）、OpenAI APIリクエスト（ResponseRequestPayload）、
-およびストリームイベント（StreamResult等）を含みます。
+およびストリームイベント（StreamResult等。こちらは軽量な dataclass）を含みます。
 """
 
-from typing import List, Literal, Optional, Union, Any
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from dataclasses import dataclass
+from typing import Literal, Any
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 
 
 # --- Constants / App Config Defaults ---
@@ -39,7 +40,7 @@ class UserConfig(BaseModel):
     """
     model_config = ConfigDict(populate_by_name=True, extra="ignore")
 
-    api_key: Optional[str] = Field(
+    api_key: str | None = Field(
         default=None, description="復号化されたOpenAI APIキー。"
     )
     model: str = Field(
@@ -53,13 +54,13 @@ class UserConfig(BaseModel):
         default="有価証券報告書 -財務分析-",
         description="現在選択されている分析戦略モード。",
     )
-    last_response_id: Optional[str] = Field(
+    last_response_id: str | None = Field(
         default=None,
         description="コンテキストの継続性を保つための最後のレスポンスID。",
     )
 
     # RAG Configuration
-    current_vector_store_id: Optional[str] = Field(
+    current_vector_store_id: str | None = Field(
         default=None, description="現在選択されているVector StoreのID。"
     )
     use_file_search: bool = Field(
@@ -70,31 +71,36 @@ class UserConfig(BaseModel):
 # --- OpenAI API Request Models (Responses API) ---
 
 class InputTextContent(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["input_text"] = "input_text"
     text: str
 
 
 class InputMessage(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     role: Literal["user", "assistant"]
-    content: List[InputTextContent]
+    content: list[InputTextContent]
 
 
 class FileSearchTool(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["file_search"] = "file_search"
-    vector_store_ids: List[str] = Field(default_factory=list)
+    # frozen でもリストは中身を書き換えられるため、使い回すインスタンスではタプルで保持する
+    vector_store_ids: tuple[str, ...] = Field(default_factory=tuple)
+
+    @field_serializer("vector_store_ids")
+    def serialize_vector_store_ids(self, v: tuple[str, ...]) -> list[str]:
+        return list(v)
 
 
 class WebSearchTool(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     type: Literal["web_search_preview"] = "web_search_preview"
-    search_context_size: Optional[Literal["low", "medium", "high"]] = "medium"
+    search_context_size: Literal["low", "medium", "high"] | None = "medium"
 
 
 class ReasoningOptions(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
     effort: Literal["none", "minimal", "low", "medium", "high", "xhigh"] = "medium"
 
 
@@ -102,19 +108,19 @@ class ResponseRequestPayload(BaseModel):
     """
     client.responses.create 用メインリクエストペイロード。
     """
-    model_config = ConfigDict(extra='forbid')
+    model_config = ConfigDict(extra='forbid', frozen=True)
 
     model: str
-    input: List[InputMessage]
-    instructions: Optional[str] = None
-    reasoning: Optional[ReasoningOptions] = None
-    tools: Optional[List[Union[FileSearchTool, WebSearchTool]]] = None
-    previous_response_id: Optional[str] = None
+    input: list[InputMessage]
+    instructions: str | None = None
+    reasoning: ReasoningOptions | None = None
+    tools: list[FileSearchTool | WebSearchTool] | None = None
+    previous_response_id: str | None = None
     stream: bool = True
 
     @field_validator("input", mode="before")
     @classmethod
-    def normalize_input(cls, v: Any) -> List[Any]:
+    def normalize_input(cls, v: Any) -> list[Any]:
         if isinstance(v, str):
             return [
                 {
@@ -126,29 +132,31 @@ class ResponseRequestPayload(BaseModel):
 
 
 # --- Stream Response Event Models ---
+# ストリームイベントはトークン毎に大量生成される内部データのため、
+# Pydantic の検証を通さず、slots 付きの軽量な dataclass で表現する。
 
-class StreamTextDelta(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamTextDelta:
     delta: str
 
 
-class StreamResponseCreated(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamResponseCreated:
     response_id: str
 
 
-class StreamUsage(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamUsage:
     input_tokens: int = 0
     output_tokens: int = 0
     total_tokens: int = 0
     cached_tokens: int = 0
 
 
-class StreamError(BaseModel):
-    model_config = ConfigDict(extra='forbid')
+@dataclass(slots=True, frozen=True)
+class StreamError:
     message: str
 
 
-StreamResult = Union[StreamTextDelta, StreamResponseCreated, StreamUsage, StreamError]
+StreamResult = StreamTextDelta | StreamResponseCreated | StreamUsage | StreamError
 
@@ -305,10 +305,10 @@ async def show_rag_manager(page: ft.Page, rag_usecase: RAGUseCase, on_close_refr
         if not current_store_id:
             return
         
-        async def _do_upload(file_path):
-            set_status("Uploading file...")
+        async def _do_upload(file_paths):
+            set_status(f"Uploading {len(file_paths)} file(s)...")
             try:
-                await rag_usecase.upload_and_index_file(file_path, current_store_id)
+                await rag_usecase.upload_and_index_files(file_paths, current_store_id)
                 await _refresh_stores()
                 set_status("File uploaded.")
             except Exception as err:
@@ -316,11 +316,10 @@ async def show_rag_manager(page: ft.Page, rag_usecase: RAGUseCase, on_close_refr
 
         # In Flet 0.8x, pick_files returns the result directly. No overlay required.
         file_picker = ft.FilePicker()
-        files = await file_picker.pick_files(allow_multiple=False)
+        files = await file_picker.pick_files(allow_multiple=True)
         
         if files:
-            for f in files:
-                page.run_task(_do_upload, f.path)
+            page.run_task(_do_upload, [f.path for f in files])
 
     async def _on_delete_file(e):
         if not current_store_id or not selected_file_id:
@@ -22,8 +22,10 @@ Fletの非同期環境に最適化されており、async/awaitを用いて直
 
 import asyncio
 import datetime
+import functools
 import structlog
-from typing import Callable, Optional, List, Awaitable, Union
+from typing import TYPE_CHECKING
+from collections.abc import Callable, Awaitable
 
 from src.models import (
     UserConfig,
@@ -37,14 +39,28 @@ from src.models import (
 )
 from src.core.pricing import CostCalculator
 from src.infrastructure.security import ConfigManager
-from src.infrastructure.openai_client import OpenAIClient
 from src.core.prompts import PromptManager
-from src.application.usecases.llm_usecase import LLMUseCase
-from src.application.usecases.rag_usecase import RAGUseCase
+
+if TYPE_CHECKING:
+    from src.application.usecases.llm_usecase import LLMUseCase
+    from src.application.usecases.rag_usecase import RAGUseCase
+    from src.infrastructure.openai_client import OpenAIClient
 
 log = structlog.get_logger()
 
 
+# ツール/推論オプションはセッション中ほぼ不変のため、frozen なインスタンスを使い回し、
+# リクエスト毎の再生成・再バリデーションを省く
+@functools.lru_cache(maxsize=32)
+def _file_search_tool(vector_store_id: str) -> FileSearchTool:
+    return FileSearchTool(type="file_search", vector_store_ids=(vector_store_id,))
+
+
+@functools.lru_cache(maxsize=8)
+def _reasoning_options(effort: str) -> ReasoningOptions:
+    return ReasoningOptions(effort=effort)
+
+
 class AppState:
     """
     アプリケーションのグローバルな状態とすべてのユースケース（機能）を管理するクラス。
@@ -62,18 +78,20 @@ class AppState:
         self.available_prompt_modes = self.prompt_manager.get_all_modes()
         
         # UI Callbacks for Reactive Updates
-        self.on_state_change: Optional[Callable[[], Union[None, Awaitable[None]]]] = None
-        self.on_text_delta: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None # (text, tag)
-        self.on_clear_text: Optional[Callable[[], Union[None, Awaitable[None]]]] = None
-        self.on_error: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None # (title, msg)
-        self.on_info: Optional[Callable[[str, str], Union[None, Awaitable[None]]]] = None # (title, msg)
-        self.on_vs_updated: Optional[Callable[[List[str]], Union[None, Awaitable[None]]]] = None
+        self.on_state_change: Callable[[], None | Awaitable[None]] | None = None
+        self.on_text_delta: Callable[[str, str], None | Awaitable[None]] | None = None # (text, tag)
+        self.on_clear_text: Callable[[], None | Awaitable[None]] | None = None
+        self.on_error: Callable[[str, str], None | Awaitable[None]] | None = None # (title, msg)
+        self.on_info: Callable[[str, str], None | Awaitable[None]] | None = None # (title, msg)
+        self.on_vs_updated: Callable[[list[str]], None | Awaitable[None]] | None = None
         
         # --- Internal ---
-        self.client: Optional[OpenAIClient] = None
-        self.llm_usecase: Optional[LLMUseCase] = None
-        self.rag_usecase: Optional[RAGUseCase] = None
+        self.client: OpenAIClient | None = None
+        self.llm_usecase: LLMUseCase | None = None
+        self.rag_usecase: RAGUseCase | None = None
         self.cancel_event: asyncio.Event = asyncio.Event()
+        # APIキー変更で差し替えられ、実行中の処理の完了を待って閉じられる旧クライアント
+        self._retiring_clients: dict[asyncio.Task[None], OpenAIClient] = {}
 
         if self.config.api_key:
             self.init_client()
@@ -104,11 +122,50 @@ class AppState:
 
     def init_client(self):
         if self.config.api_key:
+            # OpenAI SDK（httpx / anyio 等を含む）は APIキーが設定されるまで読み込まない
+            from src.application.usecases.llm_usecase import LLMUseCase
+            from src.application.usecases.rag_usecase import RAGUseCase
+            from src.infrastructure.openai_client import OpenAIClient
+
+            if self.client is not None:
+                self._retire_client()
             self.client = OpenAIClient(self.config.api_key)
             self.llm_usecase = LLMUseCase(self.client)
             self.rag_usecase = RAGUseCase(self.client)
             asyncio.create_task(self.refresh_vector_stores())
 
+    def _retire_client(self) -> None:
+        """
+        差し替え前のクライアントを、実行中のストリームや一覧取得が終わってから閉じます。
+
+        タスクは参照を保持しないと実行途中で GC されうるため、完了まで保持します。
+        """
+        client = self.client
+        task = asyncio.create_task(client.aclose(wait_idle=True))
+        self._retiring_clients[task] = client
+        task.add_done_callback(self._on_client_closed)
+
+    def _on_client_closed(self, task: asyncio.Task[None]) -> None:
+        self._retiring_clients.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("Failed to close OpenAI client", error=str(task.exception()))
+
+    async def shutdown(self) -> None:
+        """
+        アプリ終了時に、保持しているすべてのクライアントの接続を閉じます。
+
+        終了時は実行中の処理の完了を待たず、差し替え待ちの旧クライアントも直ちに閉じます。
+        """
+        clients = list(self._retiring_clients.values())
+        for task in list(self._retiring_clients):
+            task.cancel()
+        if self.client is not None:
+            clients.append(self.client)
+        results = await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                log.warning("Failed to close OpenAI client", error=str(r))
+
     def save_config(self):
         ConfigManager.save(self.config)
 
@@ -180,7 +237,7 @@ class AppState:
                 return
             
             vs_id = vs_val.split("(")[-1].strip(")") if "(" in vs_val else vs_val
-            tools = [FileSearchTool(type="file_search", vector_store_ids=[vs_id])]
+            tools = [_file_search_tool(vs_id)]
 
         self.is_processing = True
         self.status_message = f"{self.config.model} ({self.config.reasoning_effort}) で分析中..."
@@ -197,7 +254,7 @@ class AppState:
                 model=self.config.model,
                 input=user_input,
                 instructions=system_prompt,
-                reasoning=ReasoningOptions(effort=self.config.reasoning_effort),
+                reasoning=_reasoning_options(self.config.reasoning_effort),
                 previous_response_id=prev_id,
                 tools=tools,
                 stream=True,
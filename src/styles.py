@@ -20,11 +20,9 @@
 フォント、色、およびウィンドウ設定の定数を定義します。
 """
 
-from typing import Dict
-
 
 # カラーパレット
-UI_COLORS: Dict[str, str] = {
+UI_COLORS: dict[str, str] = {
     "TITLE": "#2c3e50",
     "USER_BG": "#ecf0f1",
     "USER_FG": "#2c3e50",
@@ -16,10 +16,13 @@
 import flet as ft
 import datetime
 import re
-from typing import List
 from src.state import AppState
 from src.styles import UI_COLORS
 
+# <thought>～</thought> ブロック、およびストリーミング中でまだ閉じていない
+# 末尾の <thought> ブロックを 1 回の走査でまとめて除去するためのパターン
+_THOUGHT_RE = re.compile(r'<thought>.*?(?:</thought>|\Z)', flags=re.DOTALL)
+
 class SyukatsuSupportApp:
     def __init__(self, page: ft.Page, state: AppState):
         self.page = page
@@ -39,6 +42,10 @@ class SyukatsuSupportApp:
         self.state.on_error = self._show_error
         self.state.on_info = self._show_info
         self.state.on_vs_updated = self._update_vs_combo
+
+        # 画面が閉じられたら、共有している OpenAI クライアントの接続を閉じる
+        self.page.on_close = self._on_page_close
+        self.page.on_disconnect = self._on_page_close
         
         self.chat_list = ft.ListView(expand=True, spacing=10, auto_scroll=True)
         self.current_ai_message = None
@@ -164,6 +171,9 @@ class SyukatsuSupportApp:
             ], expand=True)
         )
 
+    async def _on_page_close(self, _e):
+        await self.state.shutdown()
+
     # --- Callbacks from State ---
     async def _sync_from_state(self):
         self.status_text.value = self.state.status_message
@@ -197,10 +207,8 @@ class SyukatsuSupportApp:
             else:
                 self.current_ai_text += text
             
-            # LLMの出力結果(response_text)から <thought>～</thought> ブロックを削除
-            final_report = re.sub(r'<thought>.*?</thought>', '', self.current_ai_text, flags=re.DOTALL)
-            # ストリーミング中でまだ閉じていない <thought> ブロックも非表示化
-            final_report = re.sub(r'<thought>.*', '', final_report, flags=re.DOTALL).strip()
+            # LLMの出力結果(response_text)から <thought> ブロック（未完了のものを含む）を削除
+            final_report = _THOUGHT_RE.sub('', self.current_ai_text).strip()
             self.current_ai_message.value = final_report
         elif tag == "error":
             self.chat_list.controls.append(ft.Text(text, color=ft.Colors.RED, selectable=True))
@@ -255,7 +263,7 @@ class SyukatsuSupportApp:
         dlg.open = True
         self.page.update()
 
-    async def _update_vs_combo(self, values: List[str]):
+    async def _update_vs_combo(self, values: list[str]):
         self.vs_combo.options = [ft.dropdown.Option(val) for val in values]
         current = self.state.config.current_vector_store_id
         
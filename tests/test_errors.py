@@ -89,3 +89,21 @@ def test_unicode_encode_error_translation():
         msg = translate_fn(err)
         assert "APIキー文字エラー" in msg
         assert "全角文字" in msg
+
+
+def test_reasoning_effort_bad_request():
+    err = openai.BadRequestError(
+        message="Unsupported value: 'reasoning.effort' does not support 'xhigh' with this model.",
+        response=MagicMock(status_code=400, headers={}),
+        body=None
+    )
+    for translate_fn in [src_translate, app_translate]:
+        msg = translate_fn(err)
+        assert "モデル設定エラー" in msg
+
+
+def test_string_matchers_are_case_insensitive():
+    for translate_fn in [src_translate, app_translate]:
+        assert "多重起動" in translate_fn(Exception("Database is LOCKED"))
+        assert "タイムアウト" in translate_fn(Exception("Request Timed Out"))
+        assert "APIキーエラー" in translate_fn(Exception("Invalid_API_Key provided"))
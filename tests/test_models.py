@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import pytest
+from dataclasses import FrozenInstanceError
 from pydantic import ValidationError
 from src.models import (
     UserConfig,
@@ -50,7 +51,7 @@ def test_forbid_extra_fields():
         )
 
 def test_stream_text_delta_forbid_extra():
-    with pytest.raises(ValidationError):
+    with pytest.raises(TypeError):
         StreamTextDelta(delta="test", extra_field="fail") # type: ignore
 
 def test_tools_serialization():
@@ -63,4 +64,22 @@ def test_tools_serialization():
     dumped = payload.model_dump(exclude_none=True)
     assert "tools" in dumped
     assert dumped["tools"][0]["type"] == "file_search"
-    assert dumped["tools"][0]["vector_store_ids"] == ["vs_123"]
\ No newline at end of file
+    assert dumped["tools"][0]["vector_store_ids"] == ["vs_123"]
+
+
+def test_stream_models_are_immutable():
+    delta = StreamTextDelta(delta="test")
+    with pytest.raises(FrozenInstanceError):
+        delta.delta = "changed" # type: ignore
+
+
+def test_stream_models_use_slots():
+    assert not hasattr(StreamTextDelta(delta="x"), "__dict__")
+
+
+def test_file_search_tool_ids_cannot_be_mutated_in_place():
+    tool = FileSearchTool(vector_store_ids=["vs_123"])
+    assert tool.vector_store_ids == ("vs_123",)
+    with pytest.raises(AttributeError):
+        tool.vector_store_ids.append("vs_other") # type: ignore
+    assert tool.model_dump()["vector_store_ids"] == ["vs_123"]
@@ -13,15 +13,35 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import pytest
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
-from openai import RateLimitError
-from src.infrastructure.openai_client import OpenAIClient
-from src.models import ResponseRequestPayload, StreamResponseCreated
+import httpx
+from openai import NotFoundError, RateLimitError
+from src.infrastructure.openai_client import OpenAIClient, _coalesce_text_deltas
+from src.models import ResponseRequestPayload, StreamError, StreamResponseCreated, StreamTextDelta, StreamUsage
+
+class _AsyncPage:
+    """SDK の AsyncPaginator と同様に async for で全件を返すテスト用のページ。"""
+    def __init__(self, items, gate=None):
+        self.items = items
+        self.gate = gate
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        if self.gate:
+            await self.gate.wait()
+        for item in self.items:
+            yield item
 
 @pytest.mark.asyncio
-async def test_openai_client_resilience():
+async def test_openai_client_resilience(monkeypatch):
     client = OpenAIClient("test-key")
+    # リトライ間の待機（wait_random_exponential）で実時間を消費しないようにする
+    monkeypatch.setattr(asyncio, "sleep", AsyncMock())
 
     mock_client = MagicMock()
     mock_client.responses.create = AsyncMock()
@@ -35,9 +55,7 @@ async def test_openai_client_resilience():
     assert mock_client.responses.create.call_count == 2
 
     # For a robust test without depending on complex SDK internals, we test the event parsing:
-    event_created = MagicMock()
-    event_created.type = "response.created"
-    event_created.response.id = "resp_123"
+    event_created = SimpleNamespace(type="response.created", response=SimpleNamespace(id="resp_123"))
 
     result = client._process_event(event_created)
     assert isinstance(result, StreamResponseCreated)
@@ -60,9 +78,7 @@ async def test_stream_analysis_validation_error():
 async def test_process_text_delta():
     client = OpenAIClient("test-key")
     
-    event_delta = MagicMock()
-    event_delta.type = "response.output_text.delta"
-    event_delta.delta = "Hello"
+    event_delta = SimpleNamespace(type="response.output_text.delta", delta="Hello")
     
     result = client._process_event(event_delta)
     assert result.delta == "Hello"
@@ -71,10 +87,412 @@ async def test_process_text_delta():
 async def test_process_reasoning_text_delta():
     client = OpenAIClient("test-key")
     
-    event_delta = MagicMock()
-    event_delta.type = "response.reasoning_text.delta"
-    event_delta.delta = " Thinking..."
+    event_delta = SimpleNamespace(type="response.reasoning_text.delta", delta=" Thinking...")
     
     result = client._process_event(event_delta)
     assert result.delta == " Thinking..."
 
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_requests():
+    client = OpenAIClient("test-key")
+
+    async with client._get_client() as first:
+        pass
+    async with client._get_client() as second:
+        assert second is first
+        assert not second.is_closed()
+
+    await client.aclose()
+    assert first.is_closed()
+    assert client._client is None
+
+@pytest.mark.asyncio
+async def test_async_context_manager_closes_shared_client():
+    async with OpenAIClient("test-key") as client, client._get_client() as shared:
+        pass
+    assert shared.is_closed()
+
+@pytest.mark.asyncio
+async def test_poll_batch_status_backs_off(monkeypatch):
+    client = OpenAIClient("test-key")
+    sleep = AsyncMock()
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    monkeypatch.setattr("src.infrastructure.openai_client.random.uniform", lambda a, b: 0.0)
+
+    mock_client = MagicMock()
+    mock_client.vector_stores.file_batches.retrieve = AsyncMock(side_effect=[
+        SimpleNamespace(status="in_progress"),
+        RuntimeError("transient"),
+        SimpleNamespace(status="in_progress"),
+        SimpleNamespace(status="completed"),
+    ])
+    client._client = mock_client
+
+    status = await client.poll_batch_status("vs_1", "batch_1")
+
+    assert status == "completed"
+    # 通常は1.5倍、エラー後は2倍で間隔を広げる
+    assert [c.args[0] for c in sleep.await_args_list] == [0.5, 0.75, 1.5]
+
+@pytest.mark.asyncio
+async def test_upload_files_runs_concurrently():
+    client = OpenAIClient("test-key")
+    in_flight = 0
+    peak = 0
+
+    async def fake_upload(path, purpose="assistants"):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(id=f"file_{path}")
+
+    client.upload_file = fake_upload
+
+    results = await client.upload_files(["a", "b", "c", "d", "e"], concurrency=2)
+
+    assert [r.id for r in results] == ["file_a", "file_b", "file_c", "file_d", "file_e"]
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_upload_files_cleans_up_on_failure():
+    client = OpenAIClient("test-key")
+
+    async def fake_upload(path, purpose="assistants"):
+        if path == "bad":
+            raise FileNotFoundError(path)
+        return SimpleNamespace(id=f"file_{path}")
+
+    client.upload_file = fake_upload
+    client.delete_file = AsyncMock(return_value=True)
+
+    with pytest.raises(FileNotFoundError):
+        await client.upload_files(["ok", "bad"])
+    client.delete_file.assert_awaited_once_with("file_ok")
+
+@pytest.mark.asyncio
+async def test_upload_file_sends_name_and_bytes(tmp_path):
+    client = OpenAIClient("test-key")
+    src_file = tmp_path / "report.pdf"
+    src_file.write_bytes(b"%PDF-1.7")
+
+    mock_client = MagicMock()
+    mock_client.files.create = AsyncMock(return_value=SimpleNamespace(id="file_1"))
+    client._client = mock_client
+
+    res = await client.upload_file(str(src_file))
+
+    assert res.id == "file_1"
+    mock_client.files.create.assert_awaited_once_with(
+        file=("report.pdf", b"%PDF-1.7"), purpose="assistants"
+    )
+
+@pytest.mark.asyncio
+async def test_list_vector_stores_is_cached_until_mutation():
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.vector_stores.list = MagicMock(return_value=_AsyncPage(["vs_1"]))
+    mock_client.vector_stores.create = AsyncMock(return_value=SimpleNamespace(id="vs_2"))
+    client._client = mock_client
+
+    assert await client.list_vector_stores() == ["vs_1"]
+    assert await client.list_vector_stores() == ["vs_1"]
+    assert mock_client.vector_stores.list.call_count == 1
+
+    await client.create_vector_store("new")
+    await client.list_vector_stores()
+    assert mock_client.vector_stores.list.call_count == 2
+
+@pytest.mark.asyncio
+async def test_list_cache_expires_after_ttl(monkeypatch):
+    client = OpenAIClient("test-key", list_cache_ttl=5.0)
+    mock_client = MagicMock()
+    mock_client.vector_stores.files.list = MagicMock(return_value=_AsyncPage(["f_1"]))
+    client._client = mock_client
+
+    now = [100.0]
+    monkeypatch.setattr("src.infrastructure.openai_client.time.monotonic", lambda: now[0])
+
+    await client.list_files_in_store("vs_1")
+    now[0] += 4.0
+    await client.list_files_in_store("vs_1")
+    assert mock_client.vector_stores.files.list.call_count == 1
+
+    now[0] += 2.0
+    await client.list_files_in_store("vs_1")
+    assert mock_client.vector_stores.files.list.call_count == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_list_calls_share_one_request():
+    client = OpenAIClient("test-key")
+    release = asyncio.Event()
+
+    mock_client = MagicMock()
+    mock_client.vector_stores.files.list = MagicMock(return_value=_AsyncPage(["f_1"], gate=release))
+    client._client = mock_client
+
+    first = asyncio.ensure_future(client.list_files_in_store("vs_1"))
+    second = asyncio.ensure_future(client.list_files_in_store("vs_1"))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == ["f_1"]
+    assert await second == ["f_1"]
+    assert mock_client.vector_stores.files.list.call_count == 1
+    assert client._inflight == {}
+
+@pytest.mark.asyncio
+async def test_missing_store_lookup_is_cached():
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.vector_stores.files.list = MagicMock(side_effect=NotFoundError(
+        "not found",
+        response=httpx.Response(404, request=httpx.Request("GET", "https://api.openai.com")),
+        body=None,
+    ))
+    client._client = mock_client
+
+    assert await client.list_files_in_store("vs_gone") == []
+    assert await client.list_files_in_store("vs_gone") == []
+    assert mock_client.vector_stores.files.list.call_count == 1
+
+@pytest.mark.asyncio
+async def test_list_vector_stores_follows_pagination():
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.vector_stores.list = MagicMock(return_value=_AsyncPage([f"vs_{i}" for i in range(25)]))
+    client._client = mock_client
+
+    stores = await client.list_vector_stores(limit=20)
+
+    assert len(stores) == 25
+    mock_client.vector_stores.list.assert_called_once_with(limit=20)
+
+
+@pytest.mark.asyncio
+async def test_retrieve_file_is_cached_until_delete():
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.files.retrieve = AsyncMock(
+        return_value=SimpleNamespace(id="file_1", filename="a.pdf", created_at=0)
+    )
+    mock_client.files.delete = AsyncMock(return_value=SimpleNamespace(deleted=True))
+    client._client = mock_client
+
+    first = await client.retrieve_file("file_1")
+    second = await client.retrieve_file("file_1")
+    assert first is second
+    assert mock_client.files.retrieve.await_count == 1
+
+    # 削除したファイルのメタデータはキャッシュから破棄される
+    await client.delete_file("file_1")
+    await client.retrieve_file("file_1")
+    assert mock_client.files.retrieve.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_file_missing_path_raises(tmp_path):
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.files.create = AsyncMock()
+    client._client = mock_client
+
+    with pytest.raises(FileNotFoundError, match="File not found"):
+        await client.upload_file(str(tmp_path / "missing.pdf"))
+    mock_client.files.create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_list_files_in_store_uses_full_pages():
+    client = OpenAIClient("test-key")
+    mock_client = MagicMock()
+    mock_client.vector_stores.files.list = MagicMock(return_value=_AsyncPage(["f_1", "f_2"]))
+    client._client = mock_client
+
+    files = await client.list_files_in_store("vs_1")
+
+    assert files == ["f_1", "f_2"]
+    mock_client.vector_stores.files.list.assert_called_once_with(vector_store_id="vs_1", limit=100)
+
+
+@pytest.mark.asyncio
+async def test_delete_files_runs_concurrently_and_reports_failures():
+    client = OpenAIClient("test-key")
+    in_flight = 0
+    peak = 0
+
+    async def fake_delete(file_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if file_id == "file_b":
+            raise RuntimeError("boom")
+        return True
+
+    client.delete_file = fake_delete
+
+    failed = await client.delete_files(["file_a", "file_b", "file_c", "file_d"], concurrency=2)
+
+    assert failed == ["file_b"]
+    assert peak == 2
+
+
+def test_process_event_dispatch():
+    client = OpenAIClient("test-key")
+
+    reasoning = SimpleNamespace(type="response.reasoning_text.delta", delta="考え中")
+    assert client._process_event(reasoning) == StreamTextDelta(delta="考え中")
+
+    usage = SimpleNamespace(input_tokens=10, output_tokens=5, total_tokens=15, input_tokens_details=None)
+    completed = SimpleNamespace(type="response.completed", response=SimpleNamespace(usage=usage))
+    assert client._process_event(completed) == StreamUsage(
+        input_tokens=10, output_tokens=5, total_tokens=15, cached_tokens=0
+    )
+
+    # 未対応のイベントや type を持たないイベントは無視する
+    assert client._process_event(SimpleNamespace(type="response.output_item.added")) is None
+    assert client._process_event(object()) is None
+
+
+@pytest.mark.asyncio
+async def test_coalesce_text_deltas_flushes_on_count_and_other_events():
+    async def events():
+        for ch in "abcdefghij":
+            yield StreamTextDelta(delta=ch)
+        yield StreamError(message="err")
+        yield StreamTextDelta(delta="z")
+
+    results = [r async for r in _coalesce_text_deltas(events(), max_chunks=8, interval=60.0)]
+
+    # 8件ごとにまとめ、テキスト以外のイベントとストリーム終了時には残りを先に送出する
+    assert results == [
+        StreamTextDelta(delta="abcdefgh"),
+        StreamTextDelta(delta="ij"),
+        StreamError(message="err"),
+        StreamTextDelta(delta="z"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_text_deltas_flushes_when_source_stalls():
+    release = asyncio.Event()
+
+    async def events():
+        yield StreamTextDelta(delta="a")
+        yield StreamTextDelta(delta="b")
+        # モデルの出力が途切れた状態（ツール実行中など）を再現する
+        await release.wait()
+        yield StreamTextDelta(delta="c")
+
+    gen = _coalesce_text_deltas(events(), max_chunks=8, interval=0.01)
+
+    # 次のイベントが届かなくても、interval 経過後に溜めた差分が送出される
+    first = await asyncio.wait_for(anext(gen), timeout=1.0)
+    assert first == StreamTextDelta(delta="ab")
+    assert not release.is_set()
+
+    release.set()
+    assert [r async for r in gen] == [StreamTextDelta(delta="c")]
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_releases_client_immediately():
+    client = OpenAIClient("test-key")
+    finalized = asyncio.Event()
+
+    async def sdk_stream():
+        try:
+            yield SimpleNamespace(type="response.output_text.delta", delta="a")
+            # 続きが届かない状態で、利用側がキャンセルして抜ける
+            await asyncio.Event().wait()
+        finally:
+            finalized.set()
+
+    client._create_stream = AsyncMock(return_value=sdk_stream())
+    stream = client.stream_analysis(ResponseRequestPayload(model="gpt-5.4", input="Test"))
+
+    assert await asyncio.wait_for(anext(stream), timeout=1.0) == StreamTextDelta(delta="a")
+    assert client._active == 1
+
+    # GC を待たず、閉じた時点で元のストリームと _get_client の利用が解放される
+    await stream.aclose()
+    assert finalized.is_set()
+    assert client._active == 0
+    assert client._idle.is_set()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_wait_idle_waits_for_inflight_requests():
+    client = OpenAIClient("test-key")
+    release = asyncio.Event()
+
+    async def in_flight():
+        async with client._get_client() as shared:
+            await release.wait()
+            # 処理中に閉じられていないこと
+            assert not shared.is_closed()
+        return shared
+
+    task = asyncio.create_task(in_flight())
+    await asyncio.sleep(0)
+    closing = asyncio.create_task(client.aclose(wait_idle=True))
+    await asyncio.sleep(0)
+    assert not closing.done()
+
+    release.set()
+    shared = await task
+    await closing
+    assert shared.is_closed()
+
+
+def test_event_handlers_are_read_only():
+    with pytest.raises(TypeError):
+        OpenAIClient._EVENT_HANDLERS["response.created"] = None
+
+
+@pytest.mark.asyncio
+async def test_retrieve_file_cache_expires_and_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "src.infrastructure.openai_client.time", SimpleNamespace(monotonic=lambda: now[0])
+    )
+    client = OpenAIClient("test-key", file_meta_ttl=10.0, file_meta_maxsize=2)
+    mock_client = MagicMock()
+    mock_client.files.retrieve = AsyncMock(
+        side_effect=lambda file_id: SimpleNamespace(id=file_id)
+    )
+    client._client = mock_client
+
+    await client.retrieve_file("file_1")
+    await client.retrieve_file("file_1")
+    assert mock_client.files.retrieve.await_count == 1
+
+    # TTL を過ぎたエントリは破棄され、再取得される
+    now[0] += 11.0
+    await client.retrieve_file("file_1")
+    assert mock_client.files.retrieve.await_count == 2
+
+    # 最大件数を超えると、最も古く使われたものから破棄される
+    await client.retrieve_file("file_2")
+    await client.retrieve_file("file_3")
+    assert list(client._file_meta_cache) == ["file_2", "file_3"]
+
+
+@pytest.mark.asyncio
+async def test_async_with_returns_self_and_closes_underlying_client():
+    client = OpenAIClient("test-key")
+    underlying = MagicMock()
+    underlying.close = AsyncMock()
+    client._client = underlying
+
+    async with client as entered:
+        assert entered is client
+        underlying.close.assert_not_awaited()
+
+    underlying.close.assert_awaited_once()
+    assert client._client is None
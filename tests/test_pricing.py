@@ -14,8 +14,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import pytest
+from collections.abc import Mapping
 from dataclasses import FrozenInstanceError
-from src.core.pricing import ModelPricing, PRICING_TABLE
+from src.core.pricing import CostCalculator, ModelPricing, PRICING_TABLE
+from src.models import StreamUsage
 
 # --- Test Cases: ModelPricing Dataclass ---
 
@@ -47,14 +49,19 @@ class TestModelPricing:
 class TestPricingTable:
 
     def test_table_integrity(self):
-        """[構造] PRICING_TABLE が文字列から ModelPricing への辞書であることを検証します。"""
-        assert isinstance(PRICING_TABLE, dict)
+        """[構造] PRICING_TABLE が文字列から ModelPricing へのマッピングであることを検証します。"""
+        assert isinstance(PRICING_TABLE, Mapping)
         assert len(PRICING_TABLE) > 0
         
         for model_name, pricing in PRICING_TABLE.items():
             assert isinstance(model_name, str)
             assert isinstance(pricing, ModelPricing)
 
+    def test_table_is_read_only(self):
+        """[構造] PRICING_TABLE が実行時に書き換えられないことを検証します。"""
+        with pytest.raises(TypeError):
+            PRICING_TABLE["gpt-x"] = ModelPricing(input_price=1.0, output_price=1.0) # type: ignore
+
     @pytest.mark.parametrize("model_key", [
         "gpt-5.6-terra",
         "gpt-5.6-sol",
@@ -95,4 +102,21 @@ class TestPricingTable:
             # General rule: Output is usually more expensive than Input
             # (Not strict for all future models, but true for current ones)
             if "pro" not in name: 
-                 assert p.output_price >= p.input_price
\ No newline at end of file
+                 assert p.output_price >= p.input_price
+
+
+# --- Test Cases: CostCalculator ---
+
+class TestCostCalculator:
+
+    def test_calculate_with_cached_tokens(self):
+        """[正確性] キャッシュ済みトークンが二重に課金されないことを検証します。"""
+        usage = StreamUsage(input_tokens=1_000_000, output_tokens=500_000, total_tokens=1_500_000, cached_tokens=400_000)
+        result = CostCalculator.calculate("gpt-5.6-terra", usage)
+        # 600k * 2.00 + 400k * 0.20 + 500k * 12.00 = 1.20 + 0.08 + 6.00
+        assert result == "Cost: $7.28000 | In: 1000000 (Cache: 400000) | Out: 500000"
+
+    def test_calculate_unknown_model(self):
+        """[フォールバック] 未登録モデルの場合に Unknown Model を返すことを検証します。"""
+        usage = StreamUsage(input_tokens=10, output_tokens=10, total_tokens=20)
+        assert CostCalculator.calculate("no-such-model", usage) == "Cost: Unknown Model (no-such-model)"
@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import pytest
+from src.core import utils
 from src.core.prompts import (
     PromptManager,
     MODE_FINANCIAL,
@@ -95,4 +96,28 @@ def test_default_config_key_exists_in_prompts():
     manager = PromptManager()
     assert default_mode in manager.prompts, (
         f"Default config mode '{default_mode}' is not defined in manager"
-    )
\ No newline at end of file
+    )
+
+
+def test_missing_prompt_file_falls_back(tmp_path, monkeypatch):
+    """
+    [フェイルセーフ] JSON ファイルが存在しない場合、最小限のプロンプトで起動できることを検証します。
+    """
+    monkeypatch.setattr(utils, "get_resource_path", lambda p: tmp_path / p)
+
+    manager = PromptManager()
+    assert MODE_FINANCIAL in manager.prompts
+
+
+def test_save_roundtrip(tmp_path, monkeypatch):
+    """
+    [永続化] save() で書き出した内容が再読み込みで復元され、一時ファイルが残らないことを検証します。
+    """
+    monkeypatch.setattr(utils, "get_resource_path", lambda p: tmp_path / p)
+
+    manager = PromptManager()
+    manager.prompts["カスタム"] = "### ROLE\n### OBJECTIVE"
+    manager.save()
+
+    assert PromptManager().get_prompt("カスタム") == "### ROLE\n### OBJECTIVE"
+    assert not (tmp_path / "system_prompts.json.tmp").exists()
@@ -0,0 +1,53 @@
+# Copyright (C) 2026 合同会社ぼっち (bottiLLC)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.application.usecases.rag_usecase import RAGUseCase
+from src.infrastructure.openai_client import OpenAIClient
+
+
+@pytest.mark.asyncio
+async def test_list_files_in_store_fetches_metadata_concurrently():
+    client = OpenAIClient("test-key")
+    client.list_files_in_store = AsyncMock(
+        return_value=[SimpleNamespace(id=f"file_{i}") for i in range(3)]
+    )
+    in_flight = 0
+    peak = 0
+
+    async def fake_retrieve(file_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if file_id == "file_1":
+            raise RuntimeError("gone")
+        return SimpleNamespace(id=file_id, filename=f"{file_id}.pdf", created_at=0)
+
+    mock_client = MagicMock()
+    mock_client.files.retrieve = fake_retrieve
+    client._client = mock_client
+
+    files = await RAGUseCase(client).list_files_in_store("vs_1")
+
+    # 取得に失敗したファイルは除外し、元の順序を保つ
+    assert [f["id"] for f in files] == ["file_0", "file_2"]
+    assert peak == 3
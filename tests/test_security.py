@@ -0,0 +1,188 @@
+# Copyright (C) 2026 合同会社ぼっち (bottiLLC)
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import stat
+
+import pytest
+
+from src.infrastructure import security
+from src.infrastructure.security import SecurityManager
+
+
+@pytest.fixture
+def isolated_key(tmp_path, monkeypatch):
+    """KEY_FILE を一時ディレクトリに差し替え、キャッシュをリセットします。"""
+    monkeypatch.setattr(security, "KEY_FILE", tmp_path / ".secret.key")
+    monkeypatch.setattr(security.ConfigManager, "_last_saved", None)
+    SecurityManager._get_or_create_key.cache_clear()
+    security._get_fernet.cache_clear()
+    yield tmp_path / ".secret.key"
+    SecurityManager._get_or_create_key.cache_clear()
+    security._get_fernet.cache_clear()
+
+
+def test_encrypt_decrypt_roundtrip(isolated_key):
+    cipher = SecurityManager.encrypt("sk-test-123")
+    assert cipher and cipher != "sk-test-123"
+    assert SecurityManager.decrypt(cipher) == "sk-test-123"
+    assert isolated_key.exists()
+
+
+def test_fernet_is_cached(isolated_key):
+    SecurityManager.encrypt("a")
+    SecurityManager.decrypt(SecurityManager.encrypt("b"))
+    assert security._get_fernet.cache_info().misses == 1
+    assert SecurityManager._get_or_create_key.cache_info().misses == 1
+
+
+def test_config_save_load_roundtrip(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+    from src.models import UserConfig
+
+    monkeypatch.setattr(security, "CONFIG_FILE", isolated_key.parent / "config.json")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    ConfigManager.save(UserConfig(api_key="sk-abc", use_file_search=True, current_vector_store_id="vs_1"))
+    assert "sk-abc" not in security.CONFIG_FILE.read_text(encoding="utf-8")
+
+    loaded = ConfigManager.load()
+    assert loaded.api_key == "sk-abc"
+    assert loaded.use_file_search is True
+    assert loaded.current_vector_store_id == "vs_1"
+
+
+def test_load_resets_session_fields(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+    from src.models import UserConfig
+
+    monkeypatch.setattr(security, "CONFIG_FILE", isolated_key.parent / "config.json")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    ConfigManager.save(UserConfig(model="gpt-5.4-pro", reasoning_effort="xhigh", last_response_id="resp_1"))
+    loaded = ConfigManager.load()
+    defaults = UserConfig()
+    assert loaded.model == defaults.model
+    assert loaded.reasoning_effort == defaults.reasoning_effort
+    assert loaded.system_prompt_mode == defaults.system_prompt_mode
+    assert loaded.last_response_id is None
+
+
+def test_load_without_config_file_returns_defaults(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+
+    monkeypatch.setattr(security, "CONFIG_FILE", isolated_key.parent / "missing.json")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    config = ConfigManager.load()
+    assert config.api_key is None
+    assert config.use_file_search is False
+
+
+def test_save_skips_unchanged_config(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+    from src.models import UserConfig
+
+    config_file = isolated_key.parent / "config.json"
+    monkeypatch.setattr(security, "CONFIG_FILE", config_file)
+
+    config = UserConfig(api_key="sk-abc")
+    ConfigManager.save(config)
+    first = config_file.read_text(encoding="utf-8")
+
+    # 同じ内容なら再暗号化・再書き込みしない
+    ConfigManager.save(config)
+    assert config_file.read_text(encoding="utf-8") == first
+    assert not config_file.with_name("config.json.tmp").exists()
+
+    config.use_file_search = True
+    ConfigManager.save(config)
+    assert config_file.read_text(encoding="utf-8") != first
+
+
+def test_generated_key_is_written_atomically(isolated_key):
+    key = SecurityManager._get_or_create_key()
+    assert isolated_key.read_bytes() == key
+    assert not isolated_key.with_name(".secret.key.tmp").exists()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX のパーミッションのみ検証")
+def test_generated_key_is_never_group_or_world_readable(isolated_key, monkeypatch):
+    opened = []
+    real_open = os.open
+
+    def recording_open(path, flags, mode=0o777, *args, **kwargs):
+        opened.append((flags, mode))
+        return real_open(path, flags, mode, *args, **kwargs)
+
+    # 書き込み後に chmod するのではなく、一時ファイルを 0600 で新規作成している
+    monkeypatch.setattr(security.os, "open", recording_open)
+    SecurityManager._get_or_create_key()
+    assert len(opened) == 1
+    flags, mode = opened[0]
+    assert flags & os.O_EXCL and mode == 0o600
+    assert stat.S_IMODE(isolated_key.stat().st_mode) & 0o077 == 0
+
+
+def test_failed_key_replace_removes_temp_file(isolated_key, monkeypatch):
+    tmp_file = isolated_key.with_name(".secret.key.tmp")
+    tmp_file.write_bytes(b"stale")  # 前回の中断で残った一時ファイル
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(security.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        SecurityManager._get_or_create_key()
+    assert not tmp_file.exists()
+    assert not isolated_key.exists()
+
+
+def test_save_retries_when_api_key_could_not_be_encrypted(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+    from src.models import UserConfig
+
+    config_file = isolated_key.parent / "config.json"
+    monkeypatch.setattr(security, "CONFIG_FILE", config_file)
+    config = UserConfig(api_key="sk-abc")
+
+    # 暗号化に失敗した保存は記録せず、次回の保存でキーを書き込む
+    real_encrypt = SecurityManager.encrypt
+    monkeypatch.setattr(SecurityManager, "encrypt", lambda text: "")
+    ConfigManager.save(config)
+    assert "encrypted_api_key" not in config_file.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(SecurityManager, "encrypt", real_encrypt)
+    ConfigManager.save(config)
+    assert "encrypted_api_key" in config_file.read_text(encoding="utf-8")
+
+
+def test_save_rewrites_deleted_or_edited_config(isolated_key, monkeypatch):
+    from src.infrastructure.security import ConfigManager
+    from src.models import UserConfig
+
+    config_file = isolated_key.parent / "config.json"
+    monkeypatch.setattr(security, "CONFIG_FILE", config_file)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    config = UserConfig(api_key="sk-abc")
+    ConfigManager.save(config)
+
+    config_file.unlink()
+    ConfigManager.save(config)
+    assert ConfigManager.load().api_key == "sk-abc"
+
+    config_file.write_text("{}", encoding="utf-8")
+    ConfigManager.save(config)
+    assert ConfigManager.load().api_key == "sk-abc"